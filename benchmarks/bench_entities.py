@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import random
+import timeit
+
+from benchmarks.scenarios import populated_level
+from game.actor_ai import ActorAI, HostileAI, IdleAI
+from game.turn import end_turn
+
+DENSITIES = [0, 25, 50, 100, 200, 400]
+TURNS = 50
+
+
+# Point lookups should cost the same regardless of how many entities are on the level.
+def bench_lookup(n_monsters: int) -> float:
+    _, level, _ = populated_level(n_monsters)
+    rng = random.Random(0)
+    cells = [(rng.randrange(level.width), rng.randrange(level.height)) for _ in range(1000)]
+
+    def lookup() -> None:
+        for x, y in cells:
+            level.get_actor_at(x, y)
+
+    return min(timeit.repeat(lookup, number=10, repeat=5)) / (10 * len(cells))
+
+
+# Finding the actors in a room (as when waking it up), with the actor table and with a scan over all actors.
+def bench_area(n_monsters: int) -> tuple[float, float]:
+    _, level, _ = populated_level(n_monsters)
+
+    def table() -> None:
+        for room in level.rooms:
+            level.get_actors_in(*room)
+
+    def scan() -> None:
+        for x1, y1, x2, y2 in level.rooms:
+            [actor for actor in level.actors if x1 <= actor.x <= x2 and y1 <= actor.y <= y2]
+
+    calls = 100 * len(level.rooms)
+    return (min(timeit.repeat(table, number=100, repeat=5)) / calls,
+            min(timeit.repeat(scan, number=100, repeat=5)) / calls)
+
+
+# The cost of a turn per acting monster should stay flat as the level gets more crowded.
+# Dormant monsters are not scheduled, so a level full of them should cost next to nothing.
+def bench_turn(n_monsters: int, ai: type[ActorAI] = HostileAI) -> float:
+    player, level, log = populated_level(n_monsters, ai)
+
+    def turn() -> None:
+        end_turn(player, level, log)
+
+    return min(timeit.repeat(turn, number=TURNS, repeat=3)) / TURNS
+
+
+def main() -> None:
+    print(f"{'monsters':>8}  {'lookup (us)':>11}  {'room (us)':>9}  {'room scan (us)':>14}  {'turn (ms)':>9}"
+          f"  {'per monster (us)':>16}  {'dormant turn (ms)':>17}")
+    for n in DENSITIES:
+        lookup = bench_lookup(n)
+        area, scan = bench_area(n)
+        turn = bench_turn(n)
+        dormant = bench_turn(n, IdleAI)
+        per_monster = turn / n if n else 0.0
+        print(f"{n:8d}  {lookup * 1e6:11.3f}  {area * 1e6:9.2f}  {scan * 1e6:14.2f}  {turn * 1e3:9.3f}"
+              f"  {per_monster * 1e6:16.1f}  {dormant * 1e3:17.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+import timeit
+from collections.abc import Callable
+
+import numpy as np
+
+from game.constants import Tile
+from game.level import Level
+from game.procgen import generate_level
+from game.render import map_height, map_width
+
+CALLS = 1000
+
+
+# the field of view algorithm before the room grid was introduced, which recomputes the whole field on every call:
+# for comparison, and for the tests to check update_fov against
+def reference_fov(level: Level, x: int, y: int) -> np.ndarray[tuple[int, int], np.dtype[np.bool]]:
+    visible = np.zeros((level.width, level.height), dtype=bool, order='F')
+    for i in range(x - 1, x + 2):
+        for j in range(y - 1, y + 2):
+            if level.in_bounds(i, j):
+                if level.tiles[x, y] != Tile.PASSAGE:
+                    visible[i, j] = level.tiles[i, j] != Tile.ROCK
+                else:
+                    visible[i, j] = level.tiles[i, j] in (Tile.PASSAGE, Tile.DOOR)
+    for x1, y1, x2, y2 in level.rooms:
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            visible[x1:x2 + 1, y1:y2 + 1] = True
+    return visible
+
+
+def reference_update_fov(level: Level, x: int, y: int) -> None:
+    level.visible[:] = reference_fov(level, x, y)
+    level.explored |= level.visible
+
+
+def reference_get_room_at(level: Level, x: int, y: int) -> tuple[int, int, int, int] | None:
+    for x1, y1, x2, y2 in level.rooms:
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            return x1, y1, x2, y2
+    return None
+
+
+def main() -> None:
+    level = generate_level(map_width, map_height, 1)
+    rng = random.Random(0)
+    walkable = [(int(x), int(y)) for x, y in np.argwhere(level.walkable)]
+    cells = [rng.choice(walkable) for _ in range(CALLS)]
+
+    def measure(function: Callable[[int, int], object]) -> float:
+        def run() -> None:
+            for x, y in cells:
+                function(x, y)
+        return min(timeit.repeat(run, number=1, repeat=5)) / CALLS
+
+    results = [
+        ("update_fov, before", measure(lambda x, y: reference_update_fov(level, x, y))),
+        ("update_fov, moving", measure(level.update_fov)),
+        ("update_fov, standing still", measure(lambda x, y: level.update_fov(*cells[0]))),
+        ("get_room_at, before", measure(lambda x, y: reference_get_room_at(level, x, y))),
+        ("get_room_at", measure(level.get_room_at)),
+    ]
+    for name, seconds in results:
+        print(f"{name:28s} {seconds * 1e6:8.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import random
+import time
+
+import tcod
+
+from game.action import Action, BumpAction, WaitAction
+from game.entity import Item, Player
+from game.game_loop import enter_level, new_game
+from game.level import Level
+from game.messages import MessageLog
+from game.procgen import generate_level
+from game.render import message_lines, render_map, screen_height, screen_width
+from game.simulation import Simulation
+from game.theme import default
+
+SIZES = [(80, 22), (160, 44), (240, 66), (400, 200)]
+TURNS = 200
+
+
+# Wander around at random, so that the field of view and the visible part of the map keep changing.
+class RandomWalk:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+
+    def act(self, player: Player, level: Level, log: MessageLog) -> Action:
+        steps = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                 if (dx or dy) and level.is_walkable(player.x + dx, player.y + dy)
+                 and level.is_connected(player.x, player.y, player.x + dx, player.y + dy)]
+        if not steps:
+            return WaitAction()
+        return BumpAction(*self.rng.choice(steps))
+
+    def identify(self, player: Player, level: Level, log: MessageLog) -> Item:
+        return player.inventory.items[0]
+
+
+# Play a number of turns on a level of the given size, drawing the map after each one like the game loop does.
+def bench_turn(width: int, height: int) -> tuple[float, float]:
+    player, _, log = new_game(0)
+    player.stats.hp = player.stats.max_hp = 10**9
+    start = time.perf_counter()
+    level = generate_level(width, height, 1, seed=0)
+    generation = time.perf_counter() - start
+    enter_level(player, level)
+    simulation = Simulation(RandomWalk(0), player, level, log)
+    console = tcod.console.Console(screen_width, screen_height, order='F')
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        simulation.step()
+        render_map(console, level, message_lines, default, (player.x, player.y))
+    return generation, (time.perf_counter() - start) / TURNS
+
+
+def main() -> None:
+    print(f"{'map size':>9}  {'cells':>6}  {'generate (ms)':>13}  {'turn (us)':>9}  {'per cell (ns)':>13}")
+    for width, height in SIZES:
+        generation, turn = bench_turn(width, height)
+        cells = width * height
+        print(f"{width:4d}x{height:<4d}  {cells:6d}  {generation * 1e3:13.1f}  {turn * 1e6:9.1f}  {turn / cells * 1e9:13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import random
+import timeit
+
+import numpy as np
+
+from game.constants import Tile
+from game.pathfinding import DistanceMap, find_path, find_path_in_graph
+from game.procgen import generate_level
+from game.render import map_height, map_width
+
+QUERIES = 200
+HOSTILES = [1, 5, 10, 20, 50]
+
+
+def main() -> None:
+    level = generate_level(map_width, map_height, 1)
+    rng = random.Random(0)
+    floor = [(int(x), int(y)) for x, y in np.argwhere(level.tiles == Tile.FLOOR)]
+    queries = [(rng.choice(floor), rng.choice(floor)) for _ in range(QUERIES)]
+
+    # what every query used to do: rebuild the cost array and the graph from scratch
+    def uncached() -> None:
+        for start, goal in queries:
+            find_path(start, goal, level.walkable.astype(np.int8))
+
+    # what every query does now: reuse the graph cached by the level
+    def cached() -> None:
+        for start, goal in queries:
+            find_path_in_graph(start, goal, level.graph)
+
+    for start, goal in queries:
+        assert len(find_path(start, goal, level.cost)) == len(find_path_in_graph(start, goal, level.graph))
+    before = min(timeit.repeat(uncached, number=1, repeat=5)) / QUERIES
+    after = min(timeit.repeat(cached, number=1, repeat=5)) / QUERIES
+    print(f"A* query, uncached graph: {before * 1e6:8.1f} us")
+    print(f"A* query, cached graph:   {after * 1e6:8.1f} us  ({before / after:.1f}x)")
+
+    # one turn with N hostiles chasing the player: N A* searches versus one shared distance map
+    print(f"{'hostiles':>8}  {'A* each (us)':>12}  {'shared map (us)':>15}")
+    goal = rng.choice(floor)
+    for n in HOSTILES:
+        starts = [rng.choice(floor) for _ in range(n)]
+
+        def a_star() -> None:
+            for start in starts:
+                find_path_in_graph(start, goal, level.graph)
+
+        def shared() -> None:
+            distance_map = DistanceMap(goal, level.graph)
+            for start in starts:
+                distance_map.path_from(start)
+
+        t1 = min(timeit.repeat(a_star, number=10, repeat=5)) / 10
+        t2 = min(timeit.repeat(shared, number=10, repeat=5)) / 10
+        print(f"{n:8d}  {t1 * 1e6:12.1f}  {t2 * 1e6:15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import random
+import timeit
+from collections.abc import Callable
+
+import numpy as np
+import tcod
+
+import game.theme
+from game.entity import Actor
+from game.level import Level
+from game.procgen import generate_level
+from game.render import map_height, map_width, render_map, screen_height, screen_width
+from game.theme import Theme
+
+FRAMES = 500
+
+
+# the renderer before dirty tracking, which redraws the whole map on every frame: for comparison, and for the tests
+# to check render_map against
+def reference_render_map(console: tcod.Console, level: Level, offset_y: int, theme: Theme) -> None:
+    visible_map = theme.visible_glyphs[level.tiles]
+    explored_map = theme.explored_glyphs[level.tiles]
+    console.rgb[0:level.width, offset_y:(level.height + offset_y)] = np.select(
+        condlist=[level.visible, level.explored],
+        choicelist=[visible_map, explored_map],
+        default=theme.unexplored,
+    )
+    for entity in sorted(level.entities, key=lambda en: isinstance(en, Actor)):
+        if level.visible[entity.x, entity.y]:
+            if isinstance(entity, Actor) and entity.char is not None:
+                if not entity.invisible:
+                    console.print(entity.x, entity.y + offset_y, entity.char, fg=theme.monster_fg)
+            else:
+                char, foreground = theme.entity_glyphs[entity.glyph]
+                console.print(entity.x, entity.y + offset_y, char, fg=foreground)
+
+
+def main() -> None:
+    theme = game.theme.default
+    console = tcod.console.Console(screen_width, screen_height, order='F')
+    level = generate_level(map_width, map_height, 1)
+    rng = random.Random(0)
+    walkable = [(int(x), int(y)) for x, y in np.argwhere(level.walkable)]
+    # walk step by step between random destinations, like a player would
+    path: list[tuple[int, int]] = [rng.choice(walkable)]
+    while len(path) < FRAMES:
+        path += level.distance_map(*rng.choice(walkable)).path_from(path[-1])[1:]
+    path = path[:FRAMES]
+
+    def static(render: Callable[[tcod.Console, Level, int, Theme], None]) -> float:
+        def run() -> None:
+            for _ in range(FRAMES):
+                render(console, level, 1, theme)
+        return min(timeit.repeat(run, number=1, repeat=5)) / FRAMES
+
+    def moving(render: Callable[[tcod.Console, Level, int, Theme], None]) -> float:
+        def run() -> None:
+            for x, y in path:
+                level.update_fov(x, y)
+                render(console, level, 1, theme)
+        return min(timeit.repeat(run, number=1, repeat=5)) / FRAMES
+
+    print(f"unchanged frame, full redraw:   {static(reference_render_map) * 1e6:8.1f} us")
+    print(f"unchanged frame, incremental:   {static(render_map) * 1e6:8.1f} us")
+    print(f"moving player, full redraw:     {moving(reference_render_map) * 1e6:8.1f} us")
+    print(f"moving player, incremental:     {moving(render_map) * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import lzma
+import pickle
+import tempfile
+import time
+import timeit
+import zlib
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.scenarios import populated_level
+from game.rng import streams
+from game.dungeon import Dungeon, freeze, thaw
+from game.save import Autosave, _buffer, _encode, _pack, _unpack, save_game
+from game.schema import SCHEMA, SaveFile
+from game.simulation import Simulation, StairsBot
+
+REPEAT = 5
+
+
+# the format before the schema codec, for comparison: b'YARC\0\2\0\3'
+def reference_save(savefile: SaveFile) -> bytes:
+    return lzma.compress(pickle.dumps(savefile))
+
+
+def reference_load(data: bytes) -> SaveFile:
+    savefile = pickle.loads(lzma.decompress(data))
+    assert isinstance(savefile, SaveFile)
+    return savefile
+
+
+# the schema codec with the grids compressed along with everything else: b'YARC\0\3\0\0'
+def inline_save(savefile: SaveFile) -> bytes:
+    return zlib.compress(SCHEMA.encode(savefile))
+
+
+def inline_load(data: bytes) -> SaveFile:
+    savefile = SCHEMA.decode(zlib.decompress(data))
+    assert isinstance(savefile, SaveFile)
+    return savefile
+
+
+def save(savefile: SaveFile) -> bytes:
+    return _pack(*_encode(savefile))
+
+
+# the file is read into an aligned buffer, as by _load
+def load(data: bytes) -> SaveFile:
+    content = _buffer(len(data))
+    content[:] = data
+    return _unpack(content)
+
+
+def scenarios() -> dict[str, SaveFile]:
+    simulation = Simulation.new_game(StairsBot(), seed=0)
+    fresh = SaveFile(simulation.player, simulation.level, simulation.log, streams.getstate())
+    simulation.run(300)
+    midgame = SaveFile(simulation.player, simulation.level, simulation.log, streams.getstate())
+    crowded = SaveFile(*populated_level(400), streams.getstate())
+    return {'new game': fresh, 'depth 5': midgame, '400 monsters': crowded}
+
+
+def measure(function: Callable[[], object]) -> float:
+    return min(timeit.repeat(function, number=10, repeat=REPEAT)) / 10
+
+
+# The time the game waits for an autosave, i.e. to take the snapshot; writing it is left out.
+def stall(autosave: Autosave, savefile: SaveFile) -> float:
+    times = []
+    for _ in range(10 * REPEAT):
+        start = time.perf_counter()
+        written = autosave.save(savefile.player, Dungeon(savefile.level), savefile.log)
+        times.append(time.perf_counter() - start)
+        written.result()
+    return min(times)
+
+
+def main() -> None:
+    print(f"{'':12}  {'format':14}  {'size (bytes)':>12}  {'save (ms)':>9}  {'load (ms)':>9}")
+    for name, savefile in scenarios().items():
+        formats = [('pickle + lzma', reference_save, reference_load), ('schema + zlib', inline_save, inline_load),
+                   ('aligned grids', save, load)]
+        for fmt, dump, read in formats:
+            data = dump(savefile)
+            save_time = measure(lambda: dump(savefile))
+            load_time = measure(lambda: read(data))
+            print(f"{name:12}  {fmt:14}  {len(data):12d}  {save_time * 1e3:9.2f}  {load_time * 1e3:9.2f}")
+    # how long the game stalls for a save written to disk, in the foreground and in the background
+    print()
+    print(f"{'':12}  {'save_game (ms)':>14}  {'autosave (ms)':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        filename = Path(directory) / 'savegame'
+        autosave = Autosave(filename)
+        for name, savefile in scenarios().items():
+            args = savefile.player, Dungeon(savefile.level), savefile.log
+            foreground = measure(lambda: save_game(filename, *args))
+            background = stall(autosave, savefile)
+            print(f"{name:12}  {foreground * 1e3:14.2f}  {background * 1e3:13.2f}")
+        autosave.close()
+    # what a level visited before costs to keep, and to come back to
+    print()
+    print(f"{'':12}  {'frozen (bytes)':>14}  {'freeze (ms)':>11}  {'thaw (ms)':>9}")
+    for name, savefile in scenarios().items():
+        blob = freeze(savefile.level)
+        freeze_time = measure(lambda: freeze(savefile.level))
+        thaw_time = measure(lambda: thaw(blob))
+        print(f"{name:12}  {len(blob):14d}  {freeze_time * 1e3:11.2f}  {thaw_time * 1e3:9.2f}")
+
+
+if __name__ == '__main__':
+    main()
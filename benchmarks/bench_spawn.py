@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable
+from copy import deepcopy
+
+from game.combat import Armor, Weapon
+from game.constants import Glyph
+from game.dice import roll
+from game.entity import Actor, ArmorItem, Item, WeaponItem
+from game.items import ItemType, item_table
+from game.monsters import MonsterType, monster_table
+
+SPAWNS = 100_000
+
+
+# spawning before prototypes were shared, for comparison
+def reference_spawn_monster(monster_type: MonsterType, rng: random.Random) -> Actor:
+    stats = deepcopy(monster_type.stats)
+    stats.hp = stats.max_hp = roll(stats.hd, d=8, rng=rng)
+    stats.xp += stats.max_hp // 8
+    return Actor(x=0, y=0, glyph=Glyph.MONSTER, char=monster_type.ch, name=monster_type.name, stats=stats,
+                 erratic=monster_type.erratic, invisible=monster_type.invis, special_attack=monster_type.special,
+                 ai=monster_type.ai())
+
+
+def reference_spawn_item(item_type: ItemType) -> Item:
+    component = deepcopy(item_type.component)
+    if isinstance(component, Armor):
+        return ArmorItem(x=0, y=0, glyph=item_type.glyph, name=item_type.name, armor=component)
+    elif isinstance(component, Weapon):
+        return WeaponItem(x=0, y=0, glyph=item_type.glyph, name=item_type.name, weapon=component)
+    else:
+        return Item(x=0, y=0, glyph=item_type.glyph, name=item_type.name, consumable=component)
+
+
+def measure(spawn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    for _ in range(SPAWNS):
+        spawn()
+    return (time.perf_counter() - start) / SPAWNS
+
+
+def main() -> None:
+    rng = random.Random(0)
+    monster_types = [monster_table(depth).sample(rng) for depth in range(1, 27) for _ in range(SPAWNS // 26 + 1)]
+    item_types = [item_table().sample(rng) for _ in range(SPAWNS)]
+    monsters, items = iter(monster_types), iter(item_types)
+    before = measure(lambda: reference_spawn_monster(next(monsters), rng))
+    monsters = iter(monster_types)
+    after = measure(lambda: next(monsters).spawn(0, 0, 0, rng))
+    print(f"{SPAWNS} monsters, deepcopy:   {before * SPAWNS:6.3f} s  ({before * 1e6:5.2f} us each)")
+    print(f"{SPAWNS} monsters, prototype:  {after * SPAWNS:6.3f} s  ({after * 1e6:5.2f} us each)")
+    before = measure(lambda: reference_spawn_item(next(items)))
+    items = iter(item_types)
+    after = measure(lambda: next(items).spawn(0, 0))
+    print(f"{SPAWNS} items, deepcopy:      {before * SPAWNS:6.3f} s  ({before * 1e6:5.2f} us each)")
+    print(f"{SPAWNS} items, prototype:     {after * SPAWNS:6.3f} s  ({after * 1e6:5.2f} us each)")
+
+
+if __name__ == '__main__':
+    main()
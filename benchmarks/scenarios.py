@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+
+from game.actor_ai import ActorAI, HostileAI
+from game.constants import Tile
+from game.entity import Player
+from game.game_loop import new_game
+from game.level import Level
+from game.messages import MessageLog
+from game.monsters import monsters
+
+
+# Start a new game and crowd the first level with extra monsters.
+# The player is made (nearly) immortal so that long runs are not cut short.
+def populated_level(n_monsters: int, ai: type[ActorAI] = HostileAI,
+                    seed: int = 0) -> tuple[Player, Level, MessageLog]:
+    rng = random.Random(seed)
+    player, level, log = new_game(seed)
+    player.stats.hp = player.stats.max_hp = 10**9
+    floor = [(int(x), int(y)) for x, y in np.argwhere(level.tiles == Tile.FLOOR) if level.is_empty_at(x, y)]
+    rng.shuffle(floor)
+    for x, y in floor[:n_monsters]:
+        monster = rng.choice(monsters[:5]).spawn(x, y, 0, rng)
+        monster.ai = ai()
+        level.entities.add(monster)
+    return player, level, log
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import random
 from typing import TYPE_CHECKING, NamedTuple, Protocol
 
 from game.combat import melee_attack
@@ -9,6 +8,8 @@ from game.dice import percent
 from game.entity import Actor, ArmorItem, Item, Player, WeaponItem
 from game.level import Level
 from game.messages import MessageLog
+from game.rng import streams
+from game.timeline import TURN
 from game.turn import end_turn, wake_up_room
 
 if TYPE_CHECKING:
@@ -23,6 +24,8 @@ class Action(Protocol):
 class ActionResult(NamedTuple):
     end_turn: bool = False
     next_state: State | None = None
+    # the time the action takes, in ticks at normal speed
+    cost: int = TURN
 
 
 class MoveAction(Action):
@@ -37,7 +40,7 @@ class MoveAction(Action):
             return ActionResult(False)
         if not level.is_connected(actor.x, actor.y, new_x, new_y):
             return ActionResult(False)
-        actor.x, actor.y = new_x, new_y
+        level.move_entity(actor, new_x, new_y)
         new_room = level.get_room_at(actor.x, actor.y)
         if isinstance(actor, Player):
             if old_room != new_room:
@@ -102,7 +105,7 @@ class WaitAction(Action):
 class ConfusedAction(Action):
     def perform(self, actor: Actor, level: Level, log: MessageLog) -> ActionResult:
         action: Action
-        dx, dy = random.randint(-1, +1), random.randint(-1, +1)
+        dx, dy = streams.ai.randint(-1, +1), streams.ai.randint(-1, +1)
         dest_x, dest_y = actor.x + dx, actor.y + dy
         if (
             (dx, dy) == (0, 0)
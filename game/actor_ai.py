@@ -1,16 +1,13 @@
 from __future__ import annotations
 
 import logging
-import random
-
-import numpy as np
 
 from game.action import Action, BumpAction, WaitAction
 from game.constants import Tile
 from game.dice import roll
 from game.entity import Actor, Item, Player
 from game.level import Level
-from game.pathfinding import find_path
+from game.rng import streams
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +39,10 @@ class ActorAI:
     def is_helpless(self) -> bool:
         raise NotImplementedError()
 
+    # Whether the actor only waits on its turn, until an event (see Level.wake) changes that.
+    def is_dormant(self) -> bool:
+        return False
+
 
 # do nothing unless attacked
 class IdleAI(ActorAI):
@@ -51,6 +52,9 @@ class IdleAI(ActorAI):
     def is_helpless(self) -> bool:
         return True
 
+    def is_dormant(self) -> bool:
+        return True
+
 
 # possibly turn hostile if disturbed
 class MeanAI(ActorAI):
@@ -58,12 +62,15 @@ class MeanAI(ActorAI):
         return WaitAction()
 
     def on_disturbed(self, actor: Actor, level: Level) -> None:
-        if roll(1, d=3) > 1:
+        if roll(1, d=3, rng=streams.ai) > 1:
             aggravate(actor)
 
     def is_helpless(self) -> bool:
         return True
 
+    def is_dormant(self) -> bool:
+        return True
+
 
 # run towards gold if possible
 class GreedyAI(ActorAI):
@@ -101,6 +108,9 @@ class GreedyAI(ActorAI):
     def is_helpless(self) -> bool:
         return self.goal is None
 
+    def is_dormant(self) -> bool:
+        return self.goal is None
+
 
 # chase and attack the player
 class HostileAI(ActorAI):
@@ -160,13 +170,12 @@ def _approach(actor: Actor, goal_x: int, goal_y: int, level: Level) -> Action:
     if (actor.x, actor.y) in destinations:
         return WaitAction()
     else:
-        dest_x, dest_y = random.choice(destinations)
+        dest_x, dest_y = streams.ai.choice(destinations)
         return BumpAction(dest_x - actor.x, dest_y - actor.y)
 
 
-# Find a path to the destination using the A* algorithm.
-# The algorithm is configured to be consistent with the movement rules.
+# Find a shortest path to the destination by descending the level's distance map.
+# The map is computed once per destination and is consistent with the movement rules.
 # Return the whole sequence of steps.
 def _path_to(actor: Actor, goal_x: int, goal_y: int, level: Level) -> list[tuple[int, int]]:
-    cost = level.walkable.astype(np.int8)
-    return find_path((actor.x, actor.y), (goal_x, goal_y), cost)
+    return level.distance_map(goal_x, goal_y).path_from((actor.x, actor.y))
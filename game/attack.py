@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import random
 from dataclasses import dataclass
 
 from game.combat import save_vs_magic, save_vs_poison
@@ -8,6 +7,7 @@ from game.dice import percent, roll
 from game.entity import Actor, Player, is_magic
 from game.level import Level
 from game.messages import MessageLog
+from game.rng import streams
 
 
 class Attack:
@@ -51,7 +51,7 @@ class StealItem(Attack):
         assert isinstance(target, Player)
         items = [item for item in target.inventory.items if not target.inventory.is_equipped(item) and is_magic(item)]
         if items:
-            item = random.choice(items)
+            item = streams.combat.choice(items)
             target.inventory.remove_item(item)
             log.append(f"She stole {item}!")
             level.entities.remove(actor)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, TextIO
+
+from game.simulation import GameResult, Simulation, StairsBot
+
+logger = logging.getLogger(__name__)
+
+# upper bound on player actions per game, in case the bot gets stuck
+MAX_ACTIONS = 100_000
+
+
+@dataclass(slots=True)
+class BatchSummary:
+    games: int = 0
+    total_depth: int = 0
+    max_depth: int = 0
+    total_turns: int = 0
+    total_gold: int = 0
+    causes_of_death: Counter[str] = field(default_factory=Counter)
+
+    def add(self, result: GameResult) -> None:
+        self.games += 1
+        self.total_depth += result.depth
+        self.max_depth = max(self.max_depth, result.depth)
+        self.total_turns += result.turns
+        self.total_gold += result.gold
+        self.causes_of_death[result.cause_of_death or "survived"] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        n = max(self.games, 1)
+        return {
+            'games': self.games,
+            'mean_depth': self.total_depth / n,
+            'max_depth': self.max_depth,
+            'mean_turns': self.total_turns / n,
+            'mean_gold': self.total_gold / n,
+            'causes_of_death': dict(self.causes_of_death.most_common()),
+        }
+
+
+# Play a single game with the scripted bot. Runs in a worker process.
+def play_game(seed: int) -> tuple[int, GameResult]:
+    result = Simulation.new_game(StairsBot(), seed).run(MAX_ACTIONS)
+    return seed, result
+
+
+# Play the games on a pool of worker processes, writing one JSON line per game as soon as it ends.
+def run_batch(seeds: list[int], jobs: int | None, output: TextIO) -> BatchSummary:
+    summary = BatchSummary()
+    with multiprocessing.Pool(jobs) as pool:
+        for seed, result in pool.imap_unordered(play_game, seeds, chunksize=8):
+            summary.add(result)
+            output.write(json.dumps({'seed': seed} | asdict(result)) + '\n')
+            output.flush()
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play many games with a scripted bot and collect statistics.")
+    parser.add_argument('-n', '--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument('-s', '--seed', type=int, default=0, help="seed of the first game")
+    parser.add_argument('-o', '--output', type=argparse.FileType('w'), default=sys.stdout,
+                        help="where to write the per-game results as JSON lines (default: stdout)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    seeds = list(range(args.seed, args.seed + args.games))
+    summary = run_batch(seeds, args.jobs, args.output)
+    print(json.dumps(summary.to_dict()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+BoolGrid = np.ndarray[tuple[int, int], np.dtype[np.bool]]
+
+
+# A grid of booleans packed eight cells to a byte, in column-major order like the grids of a level.
+# Levels keep their visible and explored grids as plain boolean arrays, which are quick to index and slice cell by
+# cell; a BitMask is the form they are saved in.
+class BitMask:
+    __slots__ = ('shape', 'bits')
+
+    def __init__(self, shape: tuple[int, int], bits: np.ndarray[Any, np.dtype[np.uint8]]):
+        self.shape = shape
+        self.bits = bits
+
+    @classmethod
+    def pack(cls, grid: BoolGrid) -> BitMask:
+        return cls(grid.shape, np.packbits(grid.ravel(order='F')))
+
+    def unpack(self) -> BoolGrid:
+        size = self.shape[0] * self.shape[1]
+        grid: BoolGrid = np.unpackbits(self.bits, count=size).view(bool).reshape(self.shape, order='F')
+        return grid
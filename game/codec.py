@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import dataclasses
+import struct
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Literal
+
+import numpy as np
+
+# A compact binary encoding of object graphs, driven by a schema rather than by import paths.
+# Every value starts with a one-byte tag. Objects of a class in the schema are written as the index of the class,
+# followed by their fields in schema order. Objects referred to more than once (e.g. the player, which is both the
+# player and an entity of the level) and repeated strings are written once, and then as a reference to that first
+# occurrence. Small integers are folded into the tag.
+# NumPy arrays are written as their raw buffer, bit-packed for boolean arrays. Alternatively, they can be kept out of
+# band: their buffers are then handed over separately, to be stored as they are and used in place when decoding.
+# Renaming or moving a class keeps old data readable, but any change to the classes in a schema or to their fields
+# changes the format.
+
+(NONE, FALSE, TRUE, INT, FLOAT, STR, TUPLE, LIST, DICT, DEQUE, SLICE, ARRAY, UINT32S, ENUM, OBJECT, REF,
+ BUFFER) = range(17)
+# tags from SMALL_INT up stand for the integers from 0 up
+SMALL_INT = 32
+
+FLOAT64 = struct.Struct('<d')
+
+
+# A class in a schema. Fields default to those of a dataclass.
+# Classes defining __getstate__ and __setstate__ are written as the dictionary they return, which must have exactly
+# the given fields; other classes are written and read attribute by attribute.
+@dataclass(frozen=True, slots=True)
+class Record:
+    cls: type
+    fields: tuple[str, ...] | None = None
+
+
+class Codec:
+    def __init__(self, schema: Sequence[Record]):
+        self.classes = [record.cls for record in schema]
+        self.index = {record.cls: i for i, record in enumerate(schema)}
+        self.fields = [_fields(record) for record in schema]
+        self.stateful = [_has_state(record.cls) for record in schema]
+        assert len(self.index) == len(schema), "Duplicate class in schema."
+
+    # Arrays are kept out of band if a list is given for their buffers, which receives copies of them.
+    def encode(self, value: Any, buffers: list[bytes] | None = None) -> bytes:
+        encoder = _Encoder(self, buffers)
+        encoder.value(value)
+        return bytes(encoder.out)
+
+    # Arrays kept out of band are views of the given buffers, writable if the buffers are.
+    def decode(self, data: bytes, buffers: Sequence[memoryview] = ()) -> Any:
+        decoder = _Decoder(self, data, buffers)
+        try:
+            value = decoder.value()
+        except IndexError:
+            raise ValueError("Truncated data.") from None
+        if decoder.pos != len(data):
+            raise ValueError("Trailing data after the encoded value.")
+        return value
+
+
+def _fields(record: Record) -> tuple[str, ...]:
+    if record.fields is not None:
+        return record.fields
+    if issubclass(record.cls, IntEnum):
+        return ()
+    assert dataclasses.is_dataclass(record.cls), f"Fields of {record.cls.__name__} must be listed."
+    return tuple(field.name for field in dataclasses.fields(record.cls))
+
+
+def _has_state(cls: type) -> bool:
+    return not dataclasses.is_dataclass(cls) and '__getstate__' in vars(cls) and '__setstate__' in vars(cls)
+
+
+class _Encoder:
+    def __init__(self, codec: Codec, buffers: list[bytes] | None):
+        self.codec = codec
+        self.out = bytearray()
+        self.buffers = buffers
+        # objects by id and strings by value, to the index of their first occurrence; the objects are kept along with
+        # it, so that none is freed during the encoding and its id reused by another
+        self.memo: dict[int | str, tuple[int, Any]] = {}
+
+    def uint(self, n: int) -> None:
+        out = self.out
+        while n >= 0x80:
+            out.append(n & 0x7F | 0x80)
+            n >>= 7
+        out.append(n)
+
+    def value(self, value: Any) -> None:
+        out = self.out
+        kind = type(value)
+        if value is None:
+            out.append(NONE)
+        elif kind is bool:
+            out.append(TRUE if value else FALSE)
+        elif kind is int:
+            if 0 <= value < 256 - SMALL_INT:
+                out.append(SMALL_INT + value)
+            else:
+                out.append(INT)
+                self.uint(value << 1 if value >= 0 else (~value << 1) | 1)
+        elif kind is str:
+            if (ref := self.memo.get(value)) is not None:
+                out.append(REF)
+                self.uint(ref[0])
+                return
+            self.memo[value] = (len(self.memo), value)
+            data = value.encode()
+            out.append(STR)
+            self.uint(len(data))
+            out += data
+        elif kind is tuple or kind is list:
+            if len(value) >= 16 and all(type(n) is int and 0 <= n < 1 << 32 for n in value):
+                # e.g. the state of a random number generator
+                out.append(UINT32S)
+                self.uint(len(value))
+                out += np.array(value, dtype='<u4').tobytes()
+                out.append(kind is list)
+                return
+            out.append(TUPLE if kind is tuple else LIST)
+            self.uint(len(value))
+            for item in value:
+                self.value(item)
+        elif kind is dict:
+            out.append(DICT)
+            self.uint(len(value))
+            for key, item in value.items():
+                self.value(key)
+                self.value(item)
+        elif kind in self.codec.index:
+            self.record(value)
+        elif kind is float:
+            out.append(FLOAT)
+            out += FLOAT64.pack(value)
+        elif kind is deque:
+            out.append(DEQUE)
+            self.uint(0 if value.maxlen is None else value.maxlen + 1)
+            self.uint(len(value))
+            for item in value:
+                self.value(item)
+        elif kind is slice:
+            out.append(SLICE)
+            self.value(value.start)
+            self.value(value.stop)
+            self.value(value.step)
+        elif kind is np.ndarray:
+            self.array(value)
+        else:
+            raise TypeError(f"Cannot encode a value of type {kind.__name__}.")
+
+    def record(self, value: Any) -> None:
+        out = self.out
+        index = self.codec.index[type(value)]
+        if isinstance(value, IntEnum):
+            out.append(ENUM)
+            self.uint(index)
+            self.value(int(value))
+            return
+        if (ref := self.memo.get(id(value))) is not None:
+            out.append(REF)
+            self.uint(ref[0])
+            return
+        self.memo[id(value)] = (len(self.memo), value)
+        out.append(OBJECT)
+        self.uint(index)
+        fields = self.codec.fields[index]
+        if self.codec.stateful[index]:
+            state = value.__getstate__()
+            if state.keys() != set(fields):
+                raise TypeError(f"The state of {type(value).__name__} does not match the schema.")
+            for name in fields:
+                self.value(state[name])
+        else:
+            if hasattr(value, '__dict__') and not vars(value).keys() <= set(fields):
+                raise TypeError(f"The attributes of {type(value).__name__} do not match the schema.")
+            for name in fields:
+                self.value(getattr(value, name))
+
+    def array(self, value: np.ndarray[Any, Any]) -> None:
+        out = self.out
+        order: Literal['C', 'F'] = 'F' if value.flags.f_contiguous and not value.flags.c_contiguous else 'C'
+        out.append(ARRAY if self.buffers is None else BUFFER)
+        self.value(value.dtype.str)
+        self.value(order)
+        self.value(value.shape)
+        if self.buffers is not None:
+            self.uint(len(self.buffers))
+            self.buffers.append(value.tobytes(order=order))
+            return
+        if value.dtype == np.bool_:
+            data = np.packbits(value.ravel(order=order)).tobytes()
+        else:
+            data = value.tobytes(order=order)
+        self.uint(len(data))
+        out += data
+
+
+class _Decoder:
+    def __init__(self, codec: Codec, data: bytes, buffers: Sequence[memoryview]):
+        self.codec = codec
+        self.data = data
+        self.buffers = buffers
+        self.pos = 0
+        self.memo: list[Any] = []
+
+    def uint(self) -> int:
+        data, pos = self.data, self.pos
+        n = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return n
+            shift += 7
+
+    def bytes(self, size: int) -> bytes:
+        start = self.pos
+        self.pos += size
+        if self.pos > len(self.data):
+            raise ValueError("Truncated data.")
+        return self.data[start:self.pos]
+
+    def value(self) -> Any:
+        tag = self.data[self.pos]
+        self.pos += 1
+        if tag >= SMALL_INT:
+            return tag - SMALL_INT
+        elif tag == INT:
+            n = self.uint()
+            return ~(n >> 1) if n & 1 else n >> 1
+        elif tag == REF:
+            ref = self.uint()
+            if ref >= len(self.memo):
+                raise ValueError(f"Reference to an unknown object: {ref}")
+            return self.memo[ref]
+        elif tag == OBJECT:
+            return self.record()
+        elif tag == NONE:
+            return None
+        elif tag == FALSE:
+            return False
+        elif tag == TRUE:
+            return True
+        elif tag == STR:
+            string = self.bytes(self.uint()).decode()
+            self.memo.append(string)
+            return string
+        elif tag == TUPLE:
+            return tuple([self.value() for _ in range(self.uint())])
+        elif tag == LIST:
+            return [self.value() for _ in range(self.uint())]
+        elif tag == DICT:
+            return {self.value(): self.value() for _ in range(self.uint())}
+        elif tag == ENUM:
+            cls = self.codec.classes[self.class_index()]
+            return cls(self.value())
+        elif tag == UINT32S:
+            values = np.frombuffer(self.bytes(4 * self.uint()), dtype='<u4').tolist()
+            return values if self.bytes(1)[0] else tuple(values)
+        elif tag == FLOAT:
+            (number,) = FLOAT64.unpack(self.bytes(FLOAT64.size))
+            return number
+        elif tag == DEQUE:
+            maxlen = self.uint() - 1
+            return deque([self.value() for _ in range(self.uint())], maxlen=None if maxlen < 0 else maxlen)
+        elif tag == SLICE:
+            return slice(self.value(), self.value(), self.value())
+        elif tag == ARRAY:
+            return self.array()
+        elif tag == BUFFER:
+            dtype, order, shape = np.dtype(self.value()), self.value(), self.value()
+            return np.frombuffer(self.buffers[self.uint()], dtype=dtype).reshape(shape, order=order)
+        raise ValueError(f"Unknown tag: {tag}")
+
+    # Index errors mean truncated data, so a class missing from the schema is reported before indexing it.
+    def class_index(self) -> int:
+        index = self.uint()
+        if index >= len(self.codec.classes):
+            raise ValueError(f"Unknown class index: {index}")
+        return index
+
+    def record(self) -> Any:
+        index = self.class_index()
+        cls = self.codec.classes[index]
+        obj: Any = object.__new__(cls)
+        self.memo.append(obj)
+        fields = self.codec.fields[index]
+        if self.codec.stateful[index]:
+            obj.__setstate__({name: self.value() for name in fields})
+        else:
+            data, setattr_ = self.data, object.__setattr__
+            for name in fields:
+                # most fields are small integers, which are worth the shortcut
+                if (tag := data[self.pos]) >= SMALL_INT:
+                    self.pos += 1
+                    setattr_(obj, name, tag - SMALL_INT)
+                else:
+                    setattr_(obj, name, self.value())
+        return obj
+
+    def array(self) -> np.ndarray[Any, Any]:
+        dtype, order, shape = np.dtype(self.value()), self.value(), self.value()
+        data = self.bytes(self.uint())
+        if dtype == np.bool_:
+            size = int(np.prod(shape))
+            flat = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=size).astype(bool)
+        else:
+            flat = np.frombuffer(data, dtype=dtype).copy()
+        return flat.reshape(shape, order=order)
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import random
 from dataclasses import InitVar, dataclass, field
 
 from game.dice import parse_dice, roll
 from game.entity import Actor, Player
 from game.level import Level
 from game.messages import MessageLog
+from game.rng import streams
 
 
 @dataclass(eq=False, slots=True, kw_only=True)
@@ -20,7 +20,7 @@ class Stats:
     # hit dice (character level)
     hd: int
     # damage dice (unarmed strike)
-    base_dmg: list[tuple[int, int]] = field(init=False)
+    base_dmg: tuple[tuple[int, int], ...] = field(init=False)
     # xp value (current experience)
     xp: int
     # strength
@@ -52,17 +52,16 @@ class Armor:
 @dataclass(eq=False, slots=True, kw_only=True)
 class Weapon:
     # weapon damage dice
-    base_dmg: list[tuple[int, int]] = field(init=False)
+    base_dmg: tuple[tuple[int, int], ...] = field(init=False)
     # to hit bonus
     plus_hit: int = 0
     # damage bonus
     plus_dmg: int = 0
-
     # damage dice expression
-    dmg_dice: InitVar[str]
+    dmg_dice: str
 
-    def __post_init__(self, dmg_dice: str) -> None:
-        self.base_dmg = parse_dice(dmg_dice)
+    def __post_init__(self) -> None:
+        self.base_dmg = parse_dice(self.dmg_dice)
 
 
 def melee_attack(attacker: Actor, defender: Actor, level: Level, log: MessageLog) -> None:
@@ -81,6 +80,7 @@ def melee_attack(attacker: Actor, defender: Actor, level: Level, log: MessageLog
         armor_class = defender.inventory.armor_slot.armor.ac
     if defender.ai:
         defender.ai.on_attacked(defender)
+        level.wake(defender)
     action_hit = False
     action_dmg = 0
     for n, d in damage_dice:
@@ -117,16 +117,16 @@ def reset_heal_counter(attacker: Actor, defender: Actor) -> None:
 
 def hit_message(attacker: Actor, defender: Actor) -> str:
     if isinstance(attacker, Player):
-        return random.choice(you_hit).format(defender.name)
+        return streams.combat.choice(you_hit).format(defender.name)
     else:
-        return random.choice(it_hits).format(attacker.name)
+        return streams.combat.choice(it_hits).format(attacker.name)
 
 
 def miss_message(attacker: Actor, defender: Actor) -> str:
     if isinstance(attacker, Player):
-        return random.choice(you_miss).format(defender.name)
+        return streams.combat.choice(you_miss).format(defender.name)
     else:
-        return random.choice(it_misses).format(attacker.name)
+        return streams.combat.choice(it_misses).format(attacker.name)
 
 
 def strength_bonuses(actor: Actor) -> tuple[int, int]:
@@ -82,11 +82,7 @@ class RaiseLevel(Consumable):
 @dataclass(frozen=True, slots=True)
 class HoldMonster(Consumable):
     def use(self, actor: Actor, level: Level, log: MessageLog) -> None:
-        targets_in_area = {
-            target
-            for target in level.actors
-            if target != actor and actor.x - 2 <= target.x <= actor.x + 2 and actor.y - 2 <= target.y <= actor.y + 2
-        }
+        targets_in_area = [target for target in level.get_actors_near(actor.x, actor.y, 2) if target != actor]
         for target in targets_in_area:
             pacify(target)
         match len(targets_in_area):
@@ -104,6 +100,7 @@ class AggravateMonsters(Consumable):
         for target in level.actors:
             if target != actor:
                 aggravate(target)
+                level.wake(target)
         log.append("You hear a high-pitched humming noise.")
 
 
@@ -167,6 +164,7 @@ class MagicMapping(Consumable):
 
     def use(self, actor: Actor, level: Level, log: MessageLog) -> None:
         level.explored[:] |= MagicMapping.revealed[level.tiles]
+        level.mark_changed(np.s_[:, :])
         log.append("Oh, now this scroll has a map on it.")
 
 
@@ -1,25 +1,32 @@
 from __future__ import annotations
 
+import functools
 import random
 import re
 
+from game.rng import streams
 
-def roll(n: int, d: int) -> int:
+
+# Dice are rolled from the combat stream, unless another generator is given.
+def roll(n: int, d: int, rng: random.Random | None = None) -> int:
     assert (n > 0 and d > 0) or (n == 0 and d == 0)
+    rng = rng or streams.combat
     total = 0
     for _ in range(n):
-        total += random.randint(1, d)
+        total += rng.randint(1, d)
     return total
 
 
 def percent(p: int) -> bool:
-    return random.randrange(100) < p
+    return streams.combat.randrange(100) < p
 
 
-def parse_dice(expression: str) -> list[tuple[int, int]]:
+# The result is cached and shared by everything with the same dice, so it is immutable.
+@functools.cache
+def parse_dice(expression: str) -> tuple[tuple[int, int], ...]:
     assert re.match(r"^\d+d\d+(/\d+d\d+)*$", expression)
     result = []
     for dice in expression.split('/'):
         n, d = dice.split('d')
         result.append((int(n), int(d)))
-    return result
+    return tuple(result)
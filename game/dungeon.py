@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import logging
+import zlib
+from collections.abc import Callable
+
+from game.entity import Player
+from game.level import Level
+from game.schema import SCHEMA
+
+logger = logging.getLogger(__name__)
+
+
+# The levels of a game. Only the current level is played; a level the player left is kept as it is until the next
+# save, which freezes it into a compressed blob of a few kilobytes on the autosave thread and writes it to disk.
+# Once saved, a level is dropped and left on disk (None), to be read with the given function and thawed only when the
+# player returns to it: memory holds no more than the levels left since the last save. This is also how a saved game
+# is loaded.
+class Dungeon:
+    def __init__(self, level: Level, cold: dict[int, Level | None] | None = None,
+                 read: Callable[[int], bytes] | None = None):
+        self.level = level
+        self._cold = dict(cold or {})
+        self._read = read
+
+    @property
+    def cold_depths(self) -> tuple[int, ...]:
+        return tuple(sorted(self._cold))
+
+    # The player leaves the current level, which is left untouched until they come back.
+    def leave(self, player: Player) -> None:
+        level = self.level
+        level.entities.discard(player)
+        self._cold[level.depth] = level
+
+    # Make the given level the current one. The player must have left the previous one.
+    def enter(self, level: Level) -> Level:
+        self._cold.pop(level.depth, None)
+        self.level = level
+        return level
+
+    # A level visited before, read from disk if needed, for the player to enter it again. A level still in memory
+    # may be being saved on another thread, so the player gets a copy of it.
+    # Returns None if the level cannot be read back.
+    def revisit(self, depth: int) -> Level | None:
+        try:
+            cold = self._cold[depth]
+            if cold is not None:
+                level = thaw(freeze(cold))
+            elif self._read is None:
+                raise ValueError("The level was saved, but there is no way to read it.")
+            else:
+                level = thaw(self._read(depth))
+        except Exception as e:
+            logger.error("Unable to revisit the level at depth %d", depth, exc_info=e)
+            return None
+        level.completed = False
+        return level
+
+    # The cold levels that changed since they were last saved. They are no longer played, so they can be frozen on
+    # any thread.
+    def unsaved(self) -> list[tuple[int, Level]]:
+        return [(depth, level) for depth, level in sorted(self._cold.items()) if level is not None]
+
+    # The given levels were saved: drop those that are still current, to be read back from disk.
+    def saved(self, levels: list[tuple[int, Level]]) -> None:
+        for depth, level in levels:
+            if self._cold.get(depth) is level:
+                self._cold[depth] = None
+
+
+def freeze(level: Level) -> bytes:
+    return zlib.compress(SCHEMA.encode(level))
+
+
+def thaw(blob: bytes) -> Level:
+    level = SCHEMA.decode(zlib.decompress(blob))
+    assert isinstance(level, Level)
+    return level
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 from game.constants import Glyph
+from game.timeline import NORMAL_SPEED
 
 if TYPE_CHECKING:
     from game.actor_ai import ActorAI
@@ -29,6 +30,7 @@ class Actor(Entity):
     special_attack: Attack | None = None
     erratic: int | None = None
     invisible: bool = False
+    speed: int = NORMAL_SPEED
 
 
 @dataclass(eq=False, slots=True, kw_only=True)
@@ -8,19 +8,24 @@ import tcod
 from game.combat import Armor, Stats, Weapon
 from game.constants import Glyph
 from game.consumable import Food
+from game.dungeon import Dungeon
 from game.entity import ArmorItem, Item, Player, WeaponItem
 from game.inventory import Inventory
+from game.journal import Journal
 from game.level import Level
 from game.messages import MessageLog
-from game.procgen import generate_level
+from game.procgen import LevelPregenerator, generate_level
 from game.render import map_height, map_width
-from game.save import save_game
-from game.state import GameOver, Play, State
+from game.rng import streams
+from game.save import Autosave
+from game.state import Play, State, handle_event
 from game.theme import Theme
 from game.turn import wake_up_room
 
 
-def new_game() -> tuple[Player, Level, MessageLog]:
+# Start a new game from the given master seed, or from a random one.
+def new_game(seed: int | None = None) -> tuple[Player, Level, MessageLog]:
+    streams.reseed(seed)
     level = generate_level(map_width, map_height, 1)
     inventory = Inventory()
     food = Item(x=0, y=0, glyph=Glyph.FOOD, name="ration of food", consumable=Food(spoilable=True))
@@ -41,8 +46,8 @@ def new_game() -> tuple[Player, Level, MessageLog]:
     inventory.add_item(weapon)
     inventory.weapon_slot = weapon
     player = Player(
-        x=level.entry_x,
-        y=level.entry_y,
+        x=0,
+        y=0,
         glyph=Glyph.PLAYER,
         name="Rodney",
         stats=Stats(max_hp=12, ac=10, hd=1, dmg_dice='1d4', xp=0, strength=16),
@@ -50,30 +55,78 @@ def new_game() -> tuple[Player, Level, MessageLog]:
         inventory=inventory,
         hunger_clock=1300,
     )
-    level.entities.add(player)
-    wake_up_room(level.get_room_at(player.x, player.y), level)
-    level.update_fov(player.x, player.y)
+    enter_level(player, level)
     log = MessageLog()
     log.append("Welcome to the Dungeons of Doom! Press '?' for a list of available commands.")
     return player, level, log
 
 
+pregenerator = LevelPregenerator()
+
+
+# Move the player to the level below the current one, which has usually been generated in the background by now.
+def next_level(player: Player, level: Level) -> Level:
+    level = pregenerator.take(map_width, map_height, level.depth + 1)
+    enter_level(player, level)
+    return level
+
+
+def enter_level(player: Player, level: Level) -> None:
+    player.x, player.y = level.entry_x, level.entry_y
+    level.entities.add(player)
+    wake_up_room(level.get_room_at(player.x, player.y), level)
+    level.update_fov(player.x, player.y)
+    pregenerator.prefetch(map_width, map_height, level.depth + 1)
+
+
+# window events after which the window contents must be presented again
+REDRAW_WINDOW_EVENTS = {
+    "WindowShown",
+    "WindowExposed",
+    "WindowResized",
+    "WindowSizeChanged",
+    "WindowMaximized",
+    "WindowRestored",
+}
+
+
 def game_loop(context: tcod.context.Context, console: tcod.Console, theme: Theme, savefile: Path,
-              player: Player, level: Level, log: MessageLog) -> Never:
+              journal: Journal | None, player: Player, dungeon: Dungeon, log: MessageLog) -> Never:
     state: State = Play()
+    state.enter(log)
+    redraw = True
+    level = dungeon.level
+    # a new game has prefetched the next level already, but a loaded one has not
+    pregenerator.prefetch(map_width, map_height, level.depth + 1)
+    autosave = Autosave(savefile, journal=journal)
+    autosave.update(player, dungeon, log)
     while True:
-        console.clear(fg=theme.default_fg, bg=theme.default_bg)
-        state.render(console, player, level, log, theme)
-        context.present(console, keep_aspect=True, integer_scaling=True, clear_color=theme.default_bg)
+        if redraw:
+            console.clear(fg=theme.default_fg, bg=theme.default_bg)
+            state.render(console, player, level, log, theme)
+            context.present(console, keep_aspect=True, integer_scaling=True, clear_color=theme.default_bg)
+            redraw = False
         for event in tcod.event.wait():
             if isinstance(event, tcod.event.Quit):
-                if not isinstance(state, GameOver):
-                    save_game(savefile, player, level, log)
+                if player.stats.hp > 0:
+                    autosave.save(player, dungeon, log)
+                autosave.close()
                 raise SystemExit()
-            state = state.event(event, player, level, log)
+            if isinstance(event, tcod.event.WindowEvent) and event.type in REDRAW_WINDOW_EVENTS:
+                redraw = True
+            # only key presses reach the game logic, so they are all that is needed to replay a game
+            if journal and isinstance(event, tcod.event.KeyDown):
+                journal.record(event)
+            next_state = handle_event(state, event, player, level, log)
+            if next_state is not state:
+                state = next_state
+                redraw = True
             if level.completed:
-                level = generate_level(map_width, map_height, level.depth + 1)
-                player.x, player.y = level.entry_x, level.entry_y
-                level.entities.add(player)
-                wake_up_room(level.get_room_at(player.x, player.y), level)
-                level.update_fov(player.x, player.y)
+                dungeon.leave(player)
+                level = dungeon.enter(next_level(player, level))
+                redraw = True
+            # a dead player's game is over, even while the last messages are still on screen
+            if player.stats.hp == 0:
+                autosave.discard()
+            else:
+                autosave.update(player, dungeon, log)
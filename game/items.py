@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from copy import deepcopy
+import functools
+import math
 from dataclasses import dataclass
 
 from game.combat import Armor, Weapon
@@ -23,6 +24,7 @@ from game.consumable import (
     RestoreStrength,
 )
 from game.entity import ArmorItem, Item, WeaponItem
+from game.sampling import AliasTable
 
 
 @dataclass(frozen=True, slots=True)
@@ -32,12 +34,16 @@ class ItemType:
     name: str
     component: Armor | Consumable | Weapon
 
+    # Armor and weapons are modified by enchantments, so every item gets its own copy.
+    # Consumables are frozen and shared by all items of a type.
     def spawn(self, x: int, y: int) -> Item:
-        component = deepcopy(self.component)
+        component = self.component
         if isinstance(component, Armor):
-            return ArmorItem(x=x, y=y, glyph=self.glyph, name=self.name, armor=component)
+            armor = Armor(base_ac=component.base_ac, plus_ac=component.plus_ac)
+            return ArmorItem(x=x, y=y, glyph=self.glyph, name=self.name, armor=armor)
         elif isinstance(component, Weapon):
-            return WeaponItem(x=x, y=y, glyph=self.glyph, name=self.name, weapon=component)
+            weapon = Weapon(plus_hit=component.plus_hit, plus_dmg=component.plus_dmg, dmg_dice=component.dmg_dice)
+            return WeaponItem(x=x, y=y, glyph=self.glyph, name=self.name, weapon=weapon)
         else:
             return Item(x=x, y=y, glyph=self.glyph, name=self.name, consumable=component)
 
@@ -112,3 +118,17 @@ item_categories = [
 def get_item_categories() -> tuple[list[ItemCategory], list[int]]:
     weights = [category.weight for category in item_categories]
     return item_categories[:], weights
+
+
+# All item types in a single table, weighted by the odds of picking their category and then the type itself.
+# Type weights are scaled to a common total within each category, so the weights stay exact integers.
+@functools.cache
+def item_table() -> AliasTable[ItemType]:
+    common_total = math.lcm(*(sum(item_type.weight for item_type in c.item_types) for c in item_categories))
+    item_types, weights = [], []
+    for category in item_categories:
+        scale = common_total // sum(item_type.weight for item_type in category.item_types)
+        for item_type in category.item_types:
+            item_types.append(item_type)
+            weights.append(category.weight * item_type.weight * scale)
+    return AliasTable(item_types, weights)
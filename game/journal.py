@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO
+
+import tcod
+
+logger = logging.getLogger(__name__)
+
+# A journal holds the master seed of a game, followed by every key press handed to the game states.
+# Since all randomness derives from the master seed, this is enough to replay a whole game.
+# A game resumed from a savegame starts over in the Play state, whatever was on screen when it was saved; a RESUMED
+# record marks the spot, for replays to do the same.
+HEADER = b'YARJ\0\2\0\0'
+assert len(HEADER) == 8
+
+SEED = struct.Struct('<Q')
+RECORD = struct.Struct('<IH')
+RESUMED = (0xFFFFFFFF, 0xFFFF)
+
+
+class Journal:
+    def __init__(self, file: BinaryIO, events: int = 0):
+        self.file = file
+        # the number of records so far: key presses and resumptions
+        self.events = events
+
+    # Start a new journal, replacing any previous one.
+    @classmethod
+    def create(cls, filename: Path, seed: int) -> Journal:
+        file = filename.open('wb')
+        file.write(HEADER)
+        file.write(SEED.pack(seed))
+        return cls(file)
+
+    # Continue an existing journal, if it belongs to the game with the given seed, from the given number of records.
+    # The game resumes from a savegame, which may be older than the last key presses in the journal: those are
+    # dropped, since they will be played again.
+    @classmethod
+    def resume(cls, filename: Path, seed: int, events: int) -> Journal | None:
+        size = len(HEADER) + SEED.size + events * RECORD.size
+        try:
+            file = filename.open('r+b')
+        except OSError as e:
+            logger.warning("Unable to open journal: '%s'", filename, exc_info=e)
+            return None
+        header = file.read(len(HEADER) + SEED.size)
+        if len(header) != len(HEADER) + SEED.size or not header.startswith(HEADER):
+            logger.warning("Incompatible journal file: '%s'", filename)
+        elif SEED.unpack_from(header, len(HEADER))[0] != seed:
+            logger.warning("Journal file belongs to a different game: '%s'", filename)
+        elif os.fstat(file.fileno()).st_size < size:
+            logger.warning("Journal file is missing key presses: '%s'", filename)
+        else:
+            file.truncate(size)
+            file.seek(size)
+            file.write(RECORD.pack(*RESUMED))
+            return cls(file, events + 1)
+        file.close()
+        return None
+
+    # Writes are buffered, so recording a key press costs no more than packing a few bytes.
+    def record(self, event: tcod.event.KeyDown) -> None:
+        self.file.write(RECORD.pack(event.sym, event.mod))
+        self.events += 1
+
+    # Hand the buffered key presses over to the operating system, so that they survive the game crashing.
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        self.close()
+
+
+# Return the master seed of a journal and the key presses recorded in it, with None where the game was resumed.
+def read_journal(filename: Path) -> tuple[int, list[tcod.event.KeyDown | None]]:
+    content = filename.read_bytes()
+    if not content.startswith(HEADER):
+        raise ValueError(f"Incompatible journal file: '{filename}'")
+    (seed,) = SEED.unpack_from(content, len(HEADER))
+    start = len(HEADER) + SEED.size
+    end = start + (len(content) - start) // RECORD.size * RECORD.size
+    events = [None if record == RESUMED else _key_down(*record) for record in RECORD.iter_unpack(content[start:end])]
+    return seed, events
+
+
+def _key_down(sym: int, mod: int) -> tcod.event.KeyDown:
+    return tcod.event.KeyDown(0, tcod.event.KeySym(sym), tcod.event.Modifier(mod))
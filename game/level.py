@@ -1,9 +1,174 @@
 from __future__ import annotations
 
+from collections.abc import Iterator, KeysView, MutableSet
+from typing import Any
+
 import numpy as np
+import tcod.path
 
+from game.bitmask import BitMask
 from game.constants import Tile
 from game.entity import Actor, Entity, Item
+from game.pathfinding import CostArray, DistanceMap, create_graph
+from game.timeline import Timeline
+
+
+# Positions of the actors on a level in NumPy columns, for area queries over many actors at once.
+# Rows are appended in insertion order and only marked dead on removal, so query results keep turn order.
+# Dead rows are compacted away once they make up half of the table.
+# Only positions are kept here: they are all that the per-turn queries (adjacency, disturbance, wake-ups) look at in
+# bulk. Hit points, armor class, hit dice and AI state stay in the Stats and ActorAI objects of each actor, which
+# combat and the AI read and write one actor at a time, so columns for them would only add a copy to keep in sync.
+class ActorTable:
+    # below this many rows, a plain loop beats the overhead of the vectorized query
+    MIN_VECTORIZED = 256
+
+    def __init__(self) -> None:
+        self.rows: list[Actor | None] = []
+        self.row_of: dict[Actor, int] = {}
+        self.xs = np.zeros(16, dtype=np.int32)
+        self.ys = np.zeros(16, dtype=np.int32)
+        self.alive = np.zeros(16, dtype=bool)
+        self.dead = 0
+
+    def add(self, actor: Actor) -> None:
+        row = len(self.rows)
+        if row == len(self.xs):
+            self._resize(2 * row)
+        self.rows.append(actor)
+        self.row_of[actor] = row
+        self.xs[row], self.ys[row], self.alive[row] = actor.x, actor.y, True
+
+    def remove(self, actor: Actor) -> None:
+        row = self.row_of.pop(actor)
+        self.rows[row] = None
+        self.alive[row] = False
+        self.dead += 1
+        if self.dead > self.MIN_VECTORIZED and 2 * self.dead > len(self.rows):
+            self._compact()
+
+    def move(self, actor: Actor, x: int, y: int) -> None:
+        row = self.row_of[actor]
+        self.xs[row], self.ys[row] = x, y
+
+    # The actors inside the rectangle (edges included), in turn order.
+    def in_rect(self, x1: int, y1: int, x2: int, y2: int) -> list[Actor]:
+        n = len(self.rows)
+        if n - self.dead < self.MIN_VECTORIZED:
+            return [actor for actor in self.rows if actor and x1 <= actor.x <= x2 and y1 <= actor.y <= y2]
+        xs, ys = self.xs[:n], self.ys[:n]
+        inside = self.alive[:n] & (x1 <= xs) & (xs <= x2) & (y1 <= ys) & (ys <= y2)
+        return [actor for row in np.flatnonzero(inside).tolist() if (actor := self.rows[row])]
+
+    def _resize(self, capacity: int) -> None:
+        n = len(self.rows)
+        for name in ('xs', 'ys', 'alive'):
+            column = getattr(self, name)
+            resized = np.zeros(capacity, dtype=column.dtype)
+            resized[:n] = column[:n]
+            setattr(self, name, resized)
+
+    def _compact(self) -> None:
+        n = len(self.rows)
+        live = np.flatnonzero(self.alive[:n])
+        self.rows = [self.rows[row] for row in live.tolist()]
+        self.row_of = {actor: row for row, actor in enumerate(self.rows) if actor}
+        for column in (self.xs, self.ys, self.alive):
+            column[:len(live)] = column[live]
+            column[len(live):n] = 0
+        self.dead = 0
+
+
+# The set of entities on a level, indexed by position and by type.
+# Iteration follows insertion order, so turn order is deterministic.
+# Entities must be moved with Level.move_entity() to keep the index up to date.
+class EntitySet(MutableSet[Entity]):
+    def __init__(self) -> None:
+        self._clear()
+
+    def _clear(self) -> None:
+        self._entities: dict[Entity, None] = {}
+        self._actors: dict[Actor, None] = {}
+        self._items: dict[Item, None] = {}
+        self._by_position: dict[tuple[int, int], list[Entity]] = {}
+        self.actor_table = ActorTable()
+        # only actors that may do something on their turn are scheduled; dormant ones wait for an event to wake them
+        self.timeline = Timeline()
+
+    # The indexes are rebuilt from the entities rather than saved.
+    def __getstate__(self) -> dict[str, Any]:
+        return {'entities': list(self._entities), 'timeline': self.timeline}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._clear()
+        for entity in state['entities']:
+            self.add(entity)
+        self.timeline = state['timeline']
+
+    def __contains__(self, entity: object) -> bool:
+        return entity in self._entities
+
+    def __iter__(self) -> Iterator[Entity]:
+        return iter(self._entities)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    @property
+    def actors(self) -> KeysView[Actor]:
+        return self._actors.keys()
+
+    @property
+    def items(self) -> KeysView[Item]:
+        return self._items.keys()
+
+    def add(self, entity: Entity) -> None:
+        if entity not in self._entities:
+            self._entities[entity] = None
+            if isinstance(entity, Actor):
+                self._actors[entity] = None
+                self.actor_table.add(entity)
+                self.timeline.join(entity)
+                self.wake(entity, self.timeline.clock)
+            elif isinstance(entity, Item):
+                self._items[entity] = None
+            self._by_position.setdefault((entity.x, entity.y), []).append(entity)
+
+    def discard(self, entity: Entity) -> None:
+        if entity in self._entities:
+            del self._entities[entity]
+            if isinstance(entity, Actor):
+                del self._actors[entity]
+                self.actor_table.remove(entity)
+                self.timeline.leave(entity)
+            elif isinstance(entity, Item):
+                del self._items[entity]
+            self._unindex(entity)
+
+    def move(self, entity: Entity, x: int, y: int) -> None:
+        assert entity in self._entities
+        self._unindex(entity)
+        entity.x, entity.y = x, y
+        if isinstance(entity, Actor):
+            self.actor_table.move(entity, x, y)
+        self._by_position.setdefault((x, y), []).append(entity)
+
+    # Schedule the next action of the actor at the given time, unless it is dormant or already scheduled.
+    def wake(self, actor: Actor, time: int) -> None:
+        if actor.ai and not actor.ai.is_dormant():
+            self.timeline.schedule(actor, time)
+
+    def at(self, x: int, y: int) -> list[Entity]:
+        entities = self._by_position.get((x, y), [])
+        assert all(entity.x == x and entity.y == y for entity in entities), "Entity moved without updating the index."
+        return entities
+
+    def _unindex(self, entity: Entity) -> None:
+        position = entity.x, entity.y
+        entities_at_xy = self._by_position[position]
+        entities_at_xy.remove(entity)
+        if not entities_at_xy:
+            del self._by_position[position]
 
 
 class Level:
@@ -14,10 +179,37 @@ class Level:
         self.visible = np.zeros((width, height), dtype=bool, order='F')
         self.explored = np.zeros((width, height), dtype=bool, order='F')
         self.rooms: list[tuple[int, int, int, int]] = []
-        self.entities: set[Entity] = set()
+        # index into rooms for every cell covered by a room (walls included), -1 elsewhere
+        self.room_grid = np.full((width, height), -1, dtype=np.int16, order='F')
+        self.entities = EntitySet()
         self.entry_x, self.entry_y = 0, 0
         self.stairs_x, self.stairs_y = 0, 0
         self.completed = False
+        # the cell the field of view was last computed from, and the areas it lit up
+        self._fov_origin: tuple[int, int] | None = None
+        self._fov_lit: list[tuple[slice, slice]] = []
+        # the area whose tiles, visibility or exploration changed since the map was last drawn, as (x1, y1, x2, y2)
+        # with the far edges excluded, so that only that area is drawn again
+        self._changed: tuple[int, int, int, int] | None = None
+        # pathfinding data derived from the tiles, built on demand
+        self._cost: CostArray | None = None
+        self._graph: tcod.path.CustomGraph | None = None
+        self._distance_map: DistanceMap | None = None
+
+    # The visible and explored grids are saved packed, at a bit per cell.
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_cost'], state['_graph'], state['_distance_map'], state['_changed']
+        state['visible'], state['explored'] = BitMask.pack(self.visible), BitMask.pack(self.explored)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.visible, self.explored = state['visible'].unpack(), state['explored'].unpack()
+        self._cost = self._graph = self._distance_map = None
+        self._changed = None
+        if not self.tiles.flags.writeable:
+            self.tiles = self.tiles.copy(order='F')
 
     @property
     def walkable(self) -> np.ndarray[tuple[int, int], np.dtype[np.bool]]:
@@ -44,50 +236,143 @@ class Level:
         assert self.in_bounds(x, y)
         return Tile(self.tiles[x, y])
 
+    # Modify the tiles after the pathfinding data has been built.
+    # The tile array is read-only while that data is cached, so it can't go stale.
+    def set_tile(self, x: int, y: int, tile: Tile) -> None:
+        assert self.in_bounds(x, y)
+        self.tiles.flags.writeable = True
+        self.tiles[x, y] = tile
+        self._cost = self._graph = self._distance_map = None
+        self._fov_origin = None
+        self.mark_changed((slice(x, x + 1), slice(y, y + 1)))
+
+    # Grids other than the tiles must be changed through update_fov(), or followed by a call to this.
+    def mark_changed(self, area: tuple[slice, slice]) -> None:
+        x1, x2, _ = area[0].indices(self.width)
+        y1, y2, _ = area[1].indices(self.height)
+        if self._changed is not None:
+            x1, y1 = min(x1, self._changed[0]), min(y1, self._changed[1])
+            x2, y2 = max(x2, self._changed[2]), max(y2, self._changed[3])
+        self._changed = x1, y1, x2, y2
+
+    # The area changed since the last call, if any.
+    def take_changes(self) -> tuple[slice, slice] | None:
+        if self._changed is None:
+            return None
+        x1, y1, x2, y2 = self._changed
+        self._changed = None
+        return slice(x1, x2), slice(y1, y2)
+
+    # Movement cost for pathfinding: 1 for walkable tiles, 0 for solid ones.
     @property
-    def actors(self) -> set[Actor]:
-        return {entity for entity in self.entities if isinstance(entity, Actor)}
+    def cost(self) -> CostArray:
+        if self._cost is None:
+            self.tiles.flags.writeable = False
+            self._cost = self.walkable.astype(np.int8)
+        return self._cost
 
+    # Pathfinding graph that adheres to the movement rules.
     @property
-    def items(self) -> set[Item]:
-        return {entity for entity in self.entities if isinstance(entity, Item)}
+    def graph(self) -> tcod.path.CustomGraph:
+        if self._graph is None:
+            self._graph = create_graph(self.cost)
+        return self._graph
+
+    # Distances to the given cell (usually the player's position).
+    # Only the most recent map is kept, so all actors chasing the player in a turn share it.
+    def distance_map(self, x: int, y: int) -> DistanceMap:
+        if self._distance_map is None or self._distance_map.goal != (x, y):
+            self._distance_map = DistanceMap((x, y), self.graph)
+        return self._distance_map
+
+    @property
+    def actors(self) -> KeysView[Actor]:
+        return self.entities.actors
+
+    @property
+    def items(self) -> KeysView[Item]:
+        return self.entities.items
 
     def get_entities_at(self, x: int, y: int) -> set[Entity]:
         assert self.in_bounds(x, y)
-        return {entity for entity in self.entities if entity.x == x and entity.y == y}
+        return set(self.entities.at(x, y))
 
     def get_actor_at(self, x: int, y: int) -> Actor | None:
         assert self.in_bounds(x, y)
-        actors_at_xy = {entity for entity in self.get_entities_at(x, y) if isinstance(entity, Actor)}
+        actors_at_xy = [entity for entity in self.entities.at(x, y) if isinstance(entity, Actor)]
         assert len(actors_at_xy) <= 1
-        return actors_at_xy.pop() if actors_at_xy else None
+        return actors_at_xy[0] if actors_at_xy else None
 
     def get_item_at(self, x: int, y: int) -> Item | None:
         assert self.in_bounds(x, y)
-        items_at_xy = {entity for entity in self.get_entities_at(x, y) if isinstance(entity, Item)}
+        items_at_xy = [entity for entity in self.entities.at(x, y) if isinstance(entity, Item)]
         assert len(items_at_xy) <= 1
-        return items_at_xy.pop() if items_at_xy else None
+        return items_at_xy[0] if items_at_xy else None
+
+    @property
+    def timeline(self) -> Timeline:
+        return self.entities.timeline
+
+    # The time on the level, in ticks since it was generated.
+    @property
+    def clock(self) -> int:
+        return self.entities.timeline.clock
+
+    # Let the actor act again after an event (being attacked or disturbed), or once it is done with an action,
+    # unless it is dormant.
+    def wake(self, actor: Actor, delay: int = 0) -> None:
+        self.entities.wake(actor, self.clock + delay)
+
+    # The actors inside the rectangle (edges included), in turn order.
+    def get_actors_in(self, x1: int, y1: int, x2: int, y2: int) -> list[Actor]:
+        return self.entities.actor_table.in_rect(x1, y1, x2, y2)
+
+    # The actors at most the given number of steps away from the cell (including any actor on it), in turn order.
+    def get_actors_near(self, x: int, y: int, distance: int) -> list[Actor]:
+        return self.entities.actor_table.in_rect(x - distance, y - distance, x + distance, y + distance)
+
+    def is_empty_at(self, x: int, y: int) -> bool:
+        assert self.in_bounds(x, y)
+        return not self.entities.at(x, y)
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        assert self.in_bounds(x, y)
+        self.entities.move(entity, x, y)
+
+    def add_room(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        assert self.in_bounds(x1, y1) and self.in_bounds(x2, y2)
+        assert np.all(self.room_grid[x1:x2 + 1, y1:y2 + 1] == -1)
+        self.room_grid[x1:x2 + 1, y1:y2 + 1] = len(self.rooms)
+        self.rooms.append((x1, y1, x2, y2))
 
     def get_room_at(self, x: int, y: int) -> tuple[int, int, int, int] | None:
         assert self.in_bounds(x, y)
-        for x1, y1, x2, y2 in self.rooms:
-            if x1 <= x <= x2 and y1 <= y <= y2:
-                return x1, y1, x2, y2
-        return None
+        room = self.room_grid[x, y]
+        return self.rooms[room] if room >= 0 else None
 
     def update_fov(self, x: int, y: int) -> None:
-        self.visible[:] = False
+        if (x, y) == self._fov_origin:
+            return
+        self._fov_origin = x, y
 
-        for i in range(x - 1, x + 2):
-            for j in range(y - 1, y + 2):
-                if self.in_bounds(i, j):
-                    if self.tiles[x, y] != Tile.PASSAGE:
-                        self.visible[i, j] = self.tiles[i, j] != Tile.ROCK
-                    else:
-                        self.visible[i, j] = self.tiles[i, j] in (Tile.PASSAGE, Tile.DOOR)
+        for lit in self._fov_lit:
+            self.visible[lit] = False
+            self.mark_changed(lit)
+        self._fov_lit.clear()
 
-        for x1, y1, x2, y2 in self.rooms:
-            if x1 <= x <= x2 and y1 <= y <= y2:
-                self.visible[x1:x2 + 1, y1:y2 + 1] = True
+        around = slice(max(x - 1, 0), min(x + 2, self.width)), slice(max(y - 1, 0), min(y + 2, self.height))
+        if self.tiles[x, y] != Tile.PASSAGE:
+            self.visible[around] = self.tiles[around] != Tile.ROCK
+        else:
+            self.visible[around] = (self.tiles[around] == Tile.PASSAGE) | (self.tiles[around] == Tile.DOOR)
+        self.explored[around] |= self.visible[around]
+        self._fov_lit.append(around)
+        self.mark_changed(around)
 
-        self.explored |= self.visible
+        if (room := self.get_room_at(x, y)) is not None:
+            x1, y1, x2, y2 = room
+            inside = slice(x1, x2 + 1), slice(y1, y2 + 1)
+            self.visible[inside] = True
+            self.explored[inside] = True
+            self._fov_lit.append(inside)
+            self.mark_changed(inside)
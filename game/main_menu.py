@@ -2,25 +2,29 @@ from __future__ import annotations
 
 import logging
 import os
+from functools import partial
 from pathlib import Path
 from typing import Never
 
 import tcod
 
 import game.theme
+from game.dungeon import Dungeon
 from game.entity import Player
 from game.game_loop import game_loop, new_game
-from game.level import Level
+from game.journal import Journal
 from game.messages import MessageLog
 from game.render import screen_height, screen_width
-from game.save import load_game
+from game.rng import streams
+from game.save import load_game, read_level
 from game.strings import banner
 from game.version import version_string
 
 logger = logging.getLogger(__name__)
 
 
-def show_menu(datadir: Path, savefile: Path, theme_name: str, borderless: bool, scale_factor: int) -> Never:
+def show_menu(datadir: Path, savefile: Path, journal_file: Path, theme_name: str, borderless: bool,
+              scale_factor: int) -> Never:
     logger.info("Starting main UI initialization.")
     if os.name == 'nt':
         tcod.lib.SDL_SetHint(b'SDL_WINDOWS_DPI_AWARENESS', b'system')
@@ -37,13 +41,17 @@ def show_menu(datadir: Path, savefile: Path, theme_name: str, borderless: bool,
         sdl_window_flags=tcod.context.SDL_WINDOW_BORDERLESS if borderless else None,
     ) as context:
         console = tcod.console.Console(screen_width, screen_height, order='F')
-        player, level, log = main_menu(context, console, theme, savefile)
-        game_loop(context, console, theme, savefile, player, level, log)
+        player, dungeon, log, journal = main_menu(context, console, theme, savefile, journal_file)
+        try:
+            game_loop(context, console, theme, savefile, journal, player, dungeon, log)
+        finally:
+            if journal:
+                journal.close()
 
 
 def main_menu(
-    context: tcod.context.Context, console: tcod.Console, theme: game.theme.Theme, savefile: Path
-) -> tuple[Player, Level, MessageLog]:
+    context: tcod.context.Context, console: tcod.Console, theme: game.theme.Theme, savefile: Path, journal_file: Path
+) -> tuple[Player, Dungeon, MessageLog, Journal | None]:
     load_error = False
     while True:
         console.clear(fg=theme.default_fg, bg=theme.default_bg)
@@ -77,11 +85,13 @@ def main_menu(
                 elif event.sym == tcod.event.KeySym.c:
                     saved_state = load_game(savefile)
                     if saved_state is not None:
-                        player, level, log = saved_state
-                        return player, level, log
+                        player, dungeon, log, journal_events = saved_state
+                        journal = Journal.resume(journal_file, streams.master_seed, journal_events)
+                        return player, dungeon, log, journal
                     else:
                         load_error = True
                 elif event.sym == tcod.event.KeySym.n:
                     logger.info("New game started.")
                     player, level, log = new_game()
-                    return player, level, log
+                    journal = Journal.create(journal_file, streams.master_seed)
+                    return player, Dungeon(level, read=partial(read_level, savefile)), log, journal
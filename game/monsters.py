@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from copy import deepcopy
+import functools
+import random
 from dataclasses import KW_ONLY, InitVar, dataclass, field
 
 from game.actor_ai import ActorAI, GreedyAI, IdleAI, MeanAI
@@ -9,6 +10,7 @@ from game.combat import Stats
 from game.constants import Glyph
 from game.dice import roll
 from game.entity import Actor
+from game.sampling import AliasTable
 
 
 @dataclass(frozen=True, slots=True)
@@ -23,28 +25,29 @@ class MonsterType:
     ai: type[ActorAI] = MeanAI
     generate: bool = True
 
+    dmg_dice: str
+
     hd: InitVar[int]
     ac: InitVar[int]
-    dmg_dice: InitVar[str]
     xp_value: InitVar[int]
 
-    def __post_init__(self, hd: int, ac: int, dmg_dice: str, xp_value: int) -> None:
-        object.__setattr__(self, 'stats', Stats(max_hp=0, hd=hd, ac=ac, dmg_dice=dmg_dice, xp=xp_value))
-
-    def spawn(self, x: int, y: int, extra_hd: int) -> Actor:
-        stats = deepcopy(self.stats)
-        stats.hd += extra_hd
-        stats.ac -= extra_hd
-        stats.hp = stats.max_hp = roll(stats.hd, d=8)
-        if stats.hd > 9:
-            bonus_xp = (stats.max_hp // 6) * 20
-        elif stats.hd > 6:
-            bonus_xp = (stats.max_hp // 6) * 4
-        elif stats.hd > 1:
-            bonus_xp = stats.max_hp // 6
+    def __post_init__(self, hd: int, ac: int, xp_value: int) -> None:
+        object.__setattr__(self, 'stats', Stats(max_hp=0, hd=hd, ac=ac, dmg_dice=self.dmg_dice, xp=xp_value))
+
+    # The stats are built from scratch rather than copied from the prototype; the damage dice are shared.
+    def spawn(self, x: int, y: int, extra_hd: int, rng: random.Random) -> Actor:
+        hd = self.stats.hd + extra_hd
+        max_hp = roll(hd, d=8, rng=rng)
+        if hd > 9:
+            bonus_xp = (max_hp // 6) * 20
+        elif hd > 6:
+            bonus_xp = (max_hp // 6) * 4
+        elif hd > 1:
+            bonus_xp = max_hp // 6
         else:
-            bonus_xp = stats.max_hp // 8
-        stats.xp += bonus_xp + extra_hd * 10
+            bonus_xp = max_hp // 8
+        xp = self.stats.xp + bonus_xp + extra_hd * 10
+        stats = Stats(max_hp=max_hp, ac=self.stats.ac - extra_hd, hd=hd, dmg_dice=self.dmg_dice, xp=xp)
         return Actor(
             x=x,
             y=y,
@@ -99,6 +102,12 @@ def get_monster_types(depth: int) -> tuple[list[MonsterType], list[int]]:
     return items, weights
 
 
+# The monsters that may be generated at the given depth, compiled once per depth for constant-time sampling.
+@functools.cache
+def monster_table(depth: int) -> AliasTable[MonsterType]:
+    return AliasTable(*get_monster_types(depth))
+
+
 def _weights(depth: int) -> list[int]:
     assert depth >= 1
     weights = [0] * 26
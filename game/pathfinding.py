@@ -8,15 +8,40 @@ type CostArray = np.ndarray[tuple[int, int], np.dtype[np.int8]]
 
 # Use the A* algorithm to find the shortest path on a graph with custom edge rules.
 def find_path(start: tuple[int, int], goal: tuple[int, int], cost: CostArray) -> list[tuple[int, int]]:
-    graph = _create_graph(cost)
+    return find_path_in_graph(start, goal, create_graph(cost))
+
+
+# Same as find_path, but reuse a graph created by create_graph.
+def find_path_in_graph(start: tuple[int, int], goal: tuple[int, int],
+                       graph: tcod.path.CustomGraph) -> list[tuple[int, int]]:
     pathfinder = tcod.path.Pathfinder(graph)
     pathfinder.add_root(goal)
     path = pathfinder.path_from(start)
     return [tuple(e) for e in path.tolist()]
 
 
+# Distances from every cell to a single goal, computed once with Dijkstra's algorithm.
+# Any number of paths toward the goal can then be traced from it without further searches.
+class DistanceMap:
+    def __init__(self, goal: tuple[int, int], graph: tcod.path.CustomGraph):
+        self.goal = goal
+        self._pathfinder = tcod.path.Pathfinder(graph)
+        self._pathfinder.add_root(goal)
+        self._pathfinder.resolve()
+
+    @property
+    def distance(self) -> np.ndarray[tuple[int, int], np.dtype[np.int32]]:
+        return self._pathfinder.distance
+
+    # Follow the distance map downhill from start to the goal.
+    # Return the whole sequence of steps, like find_path.
+    def path_from(self, start: tuple[int, int]) -> list[tuple[int, int]]:
+        path = self._pathfinder.path_from(start)
+        return [tuple(e) for e in path.tolist()]
+
+
 # Create a custom graph that adheres to the no corner-cutting rule.
-def _create_graph(cost: CostArray) -> tcod.path.CustomGraph:
+def create_graph(cost: CostArray) -> tcod.path.CustomGraph:
     assert np.min(cost) >= 0 and np.max(cost) <= 1
     graph = tcod.path.CustomGraph(cost.shape, order='F')
     graph.add_edges(edge_map=[[0, 2, 0], [2, 0, 2], [0, 2, 0]], cost=cost)
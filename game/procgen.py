@@ -1,17 +1,22 @@
 from __future__ import annotations
 
+import functools
 import logging
 import random
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
 
 from game.constants import Glyph, Tile
 from game.entity import ArmorItem, Item, WeaponItem
-from game.items import get_item_categories
+from game.items import item_table
 from game.level import Level
-from game.monsters import get_monster_types
+from game.monsters import monster_table
+from game.rng import streams
 
-# hardcoded 80x22 subdivision
-H_GRID = [0, 26, 27, 53, 54, 80]
-V_GRID = [0, 7, 8, 14, 15, 22]
+# the classic 80x22 map is split into a 3x3 grid of cells, each 26 columns and 6 or 7 rows
+CELL_WIDTH = 26
+CELL_HEIGHT = 6
 
 # minimum room size is 4x4
 MIN_ROOM_WIDTH = 4
@@ -19,46 +24,74 @@ MIN_ROOM_HEIGHT = 4
 
 logger = logging.getLogger(__name__)
 
-rng = random.Random()
-
 
-# a cell in the 3x3 map grid
+# The subdivision of the map into cells, each holding one room or junction.
+# Neighbouring cells are one column or row apart, so that rooms never touch.
+# Raises ValueError if the map cannot be split into cells that fit the smallest room.
+class Grid:
+    def __init__(self, map_width: int, map_height: int, cols: int, rows: int):
+        if cols <= 0 or rows <= 0:
+            raise ValueError(f"A grid of {cols}x{rows} cells is empty.")
+        self.cols, self.rows = cols, rows
+        # cell boundaries, rounded to the nearest column/row
+        self.xs = [(2 * i * (map_width + 1) + cols) // (2 * cols) for i in range(cols + 1)]
+        self.ys = [(2 * j * (map_height + 1) + rows) // (2 * rows) for j in range(rows + 1)]
+        self.cells = [Cell(i, self) for i in range(cols * rows)]
+        if not all(cell.width >= MIN_ROOM_WIDTH and cell.height >= MIN_ROOM_HEIGHT for cell in self.cells):
+            raise ValueError(f"A {map_width}x{map_height} map is too small for a grid of {cols}x{rows} cells.")
+        # the neighbours of each cell, in index order
+        n = len(self.cells)
+        self.neighbours = [
+            [j for j in (i - cols, i - 1, i + 1, i + cols) if 0 <= j < n and cell.is_neighbour(self.cells[j])]
+            for i, cell in enumerate(self.cells)
+        ]
+
+    # The largest grid whose cells are about as big as on the classic map.
+    @classmethod
+    def for_map(cls, map_width: int, map_height: int) -> Grid:
+        cols = max(1, (map_width + 1) // (CELL_WIDTH + 1))
+        rows = max(1, (map_height + 1) // (CELL_HEIGHT + 1))
+        return cls(map_width, map_height, cols, rows)
+
+
+# a cell in the map grid
 class Cell:
-    def __init__(self, index: int):
-        assert 0 <= index < 9
+    def __init__(self, index: int, grid: Grid):
+        assert 0 <= index < grid.cols * grid.rows
         self.index = index
+        self.grid = grid
 
     @property
     def grid_i(self) -> int:
-        return self.index % 3
+        return self.index % self.grid.cols
 
     @property
     def grid_j(self) -> int:
-        return self.index // 3
+        return self.index // self.grid.cols
 
     @property
     def x1(self) -> int:
-        return H_GRID[self.grid_i * 2]
+        return self.grid.xs[self.grid_i]
 
     @property
     def y1(self) -> int:
-        return V_GRID[self.grid_j * 2]
+        return self.grid.ys[self.grid_j]
 
     @property
     def width(self) -> int:
-        return H_GRID[self.grid_i * 2 + 1] - self.x1
+        return self.x2 - self.x1 + 1
 
     @property
     def height(self) -> int:
-        return V_GRID[self.grid_j * 2 + 1] - self.y1
+        return self.y2 - self.y1 + 1
 
     @property
     def x2(self) -> int:
-        return H_GRID[self.grid_i * 2 + 1] - 1
+        return self.grid.xs[self.grid_i + 1] - 2
 
     @property
     def y2(self) -> int:
-        return V_GRID[self.grid_j * 2 + 1] - 1
+        return self.grid.ys[self.grid_j + 1] - 2
 
     def is_neighbour(self, other: Cell) -> bool:
         if self.grid_i == other.grid_i:
@@ -99,42 +132,32 @@ class Junction:
         self.cell = cell
 
 
-def line_slice(x1: int, y1: int, x2: int, y2: int) -> tuple[slice, slice]:
-    assert x1 == x2 or y1 == y2
-    if x1 > x2:
-        x1, x2 = x2, x1
-    if y1 > y2:
-        y1, y2 = y2, y1
-    return slice(x1, x2 + 1), slice(y1, y2 + 1)
+# a straight passage segment, including both ends
+type Segment = tuple[int, int, int, int]
+
 
+# a passage between two rooms or junctions, made of three straight segments with a door at each room
+class Passage:
+    def __init__(self, segments: list[Segment], doors: list[tuple[int, int]]):
+        self.segments = segments
+        self.doors = doors
 
-def make_room(cell: Cell, level: Level) -> Room:
+
+def make_room(cell: Cell, rng: random.Random) -> Room:
     room_width = rng.randint(MIN_ROOM_WIDTH, cell.width)
     room_x1 = rng.randint(cell.x1, cell.x1 + (cell.width - room_width))
     room_height = rng.randint(MIN_ROOM_HEIGHT, cell.height)
     room_y1 = rng.randint(cell.y1, cell.y1 + (cell.height - room_height))
-    room = Room(room_x1, room_y1, room_width, room_height, cell)
-    level.tiles[line_slice(room.x1, room.y1, room.x1, room.y2)] = Tile.V_WALL
-    level.tiles[line_slice(room.x2, room.y1, room.x2, room.y2)] = Tile.V_WALL
-    level.tiles[line_slice(room.x1, room.y1, room.x2, room.y1)] = Tile.H_WALL
-    level.tiles[line_slice(room.x1, room.y2, room.x2, room.y2)] = Tile.H_WALL
-    level.tiles[room.inner_slice] = Tile.FLOOR
-    level.tiles[room.x1, room.y1] = Tile.TL_CORNER
-    level.tiles[room.x2, room.y1] = Tile.TR_CORNER
-    level.tiles[room.x1, room.y2] = Tile.BL_CORNER
-    level.tiles[room.x2, room.y2] = Tile.BR_CORNER
-    level.rooms.append((room.x1, room.y1, room.x2, room.y2))
-    return room
-
-
-def make_junction(cell: Cell, level: Level) -> Junction:
+    return Room(room_x1, room_y1, room_width, room_height, cell)
+
+
+def make_junction(cell: Cell, rng: random.Random) -> Junction:
     x = rng.randint(cell.x1, cell.x2)
     y = rng.randint(cell.y1, cell.y2)
-    level.tiles[x, y] = Tile.PASSAGE
     return Junction(x, y, cell)
 
 
-def make_passage(room1: Room | Junction, room2: Room | Junction, level: Level) -> None:
+def make_passage(room1: Room | Junction, room2: Room | Junction, rng: random.Random) -> Passage:
     assert room1.cell != room2.cell
     assert room1.cell.is_neighbour(room2.cell)
     if room1.cell.grid_j == room2.cell.grid_j:
@@ -151,13 +174,7 @@ def make_passage(room1: Room | Junction, room2: Room | Junction, level: Level) -
             x2, y2 = room2.x, room2.y
         assert x2 - x1 > 1
         xm = rng.randint(x1 + 1, x2 - 1)
-        level.tiles[line_slice(x1, y1, xm, y1)] = Tile.PASSAGE
-        level.tiles[line_slice(xm, y1, xm, y2)] = Tile.PASSAGE
-        level.tiles[line_slice(xm, y2, x2, y2)] = Tile.PASSAGE
-        if isinstance(room1, Room):
-            level.tiles[x1, y1] = Tile.DOOR
-        if isinstance(room2, Room):
-            level.tiles[x2, y2] = Tile.DOOR
+        segments = [(x1, y1, xm, y1), (xm, y1, xm, y2), (xm, y2, x2, y2)]
     else:
         assert room1.cell.grid_i == room2.cell.grid_i
         # make vertical passage
@@ -173,93 +190,172 @@ def make_passage(room1: Room | Junction, room2: Room | Junction, level: Level) -
             x2, y2 = room2.x, room2.y
         assert y2 - y1 > 1
         ym = rng.randint(y1 + 1, y2 - 1)
-        level.tiles[line_slice(x1, y1, x1, ym)] = Tile.PASSAGE
-        level.tiles[line_slice(x1, ym, x2, ym)] = Tile.PASSAGE
-        level.tiles[line_slice(x2, ym, x2, y2)] = Tile.PASSAGE
-        if isinstance(room1, Room):
-            level.tiles[x1, y1] = Tile.DOOR
-        if isinstance(room2, Room):
-            level.tiles[x2, y2] = Tile.DOOR
-
-
-def connect_rooms(all_rooms: list[Room | Junction], level: Level) -> None:
+        segments = [(x1, y1, x1, ym), (x1, ym, x2, ym), (x2, ym, x2, y2)]
+    doors = []
+    if isinstance(room1, Room):
+        doors.append((x1, y1))
+    if isinstance(room2, Room):
+        doors.append((x2, y2))
+    return Passage(segments, doors)
+
+
+# Disjoint sets of cells of the grid, to track which rooms are already connected.
+class CellSets:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> int:
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            if self.size[i] < self.size[j]:
+                i, j = j, i
+            self.parent[j] = i
+            self.size[i] += self.size[j]
+        return self.size[i]
+
+
+# Describe the passages that connect all rooms/junctions, plus a few more. The rooms are listed by cell index.
+def connect_rooms(all_rooms: list[Room | Junction], rng: random.Random) -> list[Passage]:
     passages = []
+    linked = set()
+    grid = all_rooms[0].cell.grid
     # ensure all rooms/junctions are connected
-    connected = [rng.choice(all_rooms)]
-    unconnected = [room for room in all_rooms if room not in connected]
-    while unconnected:
+    sets = CellSets(len(all_rooms))
+    start = rng.choice(all_rooms).cell.index
+    connected = [start]
+    while len(connected) < len(all_rooms):
         curr = rng.choice(connected)
-        neighbours = [room for room in unconnected if room.cell.is_neighbour(curr.cell)]
+        neighbours = [i for i in grid.neighbours[curr] if sets.find(i) != sets.find(start)]
         if neighbours:
             dest = rng.choice(neighbours)
             connected.append(dest)
-            unconnected.remove(dest)
-            make_passage(curr, dest, level)
-            passages += [(curr, dest), (dest, curr)]
-    # add some random passages
-    for _ in range(rng.randrange(5)):
-        curr = rng.choice(all_rooms)
-        neighbours = [room for room in all_rooms if room.cell.is_neighbour(curr.cell) and (curr, room) not in passages]
+            sets.union(start, dest)
+            passages.append(make_passage(all_rooms[curr], all_rooms[dest], rng))
+            linked |= {(curr, dest), (dest, curr)}
+    # add some random passages, about one for every two cells
+    for _ in range(rng.randrange(len(all_rooms) * 5 // 9 or 1)):
+        curr = rng.choice(all_rooms).cell.index
+        neighbours = [i for i in grid.neighbours[curr] if (curr, i) not in linked]
         if neighbours:
             dest = rng.choice(neighbours)
-            make_passage(curr, dest, level)
-            passages += [(curr, dest), (dest, curr)]
-
-
-def find_empty_spot_in_room(room: Room, level: Level) -> tuple[int, int]:
-    if __debug__:
-        found = False
-        for x in range(room.x1 + 1, room.x1 + room.width - 1):
-            for y in range(room.y1 + 1, room.y1 + room.height - 1):
-                if not level.get_entities_at(x, y):
-                    found = True
-        assert found, "No empty coordinates were found in the given room."
-    while True:
-        x = rng.randint(room.x1 + 1, room.x2 - 1)
-        y = rng.randint(room.y1 + 1, room.y2 - 1)
-        if not level.get_entities_at(x, y):
-            return x, y
-
-
-def find_empty_spot(all_rooms: list[Room | Junction], level: Level) -> tuple[int, int]:
-    rooms = [room for room in all_rooms if isinstance(room, Room)]
-    if __debug__:
-        found = False
-        for room in rooms:
-            for x in range(room.x1 + 1, room.x1 + room.width - 1):
-                for y in range(room.y1 + 1, room.y1 + room.height - 1):
-                    if not level.get_entities_at(x, y):
-                        found = True
-        assert found, "No empty coordinates were found on the entire map."
-    while True:
-        room = rng.choice(rooms)
-        x = rng.randint(room.x1 + 1, room.x2 - 1)
-        y = rng.randint(room.y1 + 1, room.y2 - 1)
-        if not level.get_entities_at(x, y):
-            return x, y
-
-
-def place_gold(room: Room, level: Level) -> None:
-    x, y = find_empty_spot_in_room(room, level)
+            passages.append(make_passage(all_rooms[curr], all_rooms[dest], rng))
+            linked |= {(curr, dest), (dest, curr)}
+    return passages
+
+
+# Paint the rooms, then the passages, then the doors onto the (empty) tile grid.
+def carve(level: Level, all_rooms: list[Room | Junction], passages: list[Passage]) -> None:
+    for room in all_rooms:
+        if isinstance(room, Room):
+            level.tiles[room.x1:room.x2 + 1, room.y1:room.y2 + 1] = room_tiles(room.width, room.height)
+            level.add_room(room.x1, room.y1, room.x2, room.y2)
+
+    # junctions are passages of a single cell
+    segments = [segment for passage in passages for segment in passage.segments]
+    segments += [(room.x, room.y, room.x, room.y) for room in all_rooms if isinstance(room, Junction)]
+    level.tiles[segment_cells(np.array(segments))] = Tile.PASSAGE
+    doors = [door for passage in passages for door in passage.doors]
+    if doors:
+        level.tiles[tuple(np.array(doors).T)] = Tile.DOOR
+
+
+# The tiles of a room of the given size, walls included. There are only a few hundred possible sizes.
+@functools.cache
+def room_tiles(width: int, height: int) -> np.ndarray:
+    tiles = np.full((width, height), Tile.FLOOR, dtype=np.uint8)
+    tiles[[0, -1], :] = Tile.V_WALL
+    tiles[:, [0, -1]] = Tile.H_WALL
+    tiles[[0, -1, 0, -1], [0, 0, -1, -1]] = [Tile.TL_CORNER, Tile.TR_CORNER, Tile.BL_CORNER, Tile.BR_CORNER]
+    tiles.flags.writeable = False
+    return tiles
+
+
+# Return the coordinates of all cells covered by the given horizontal or vertical segments.
+def segment_cells(segments: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    x1, y1, x2, y2 = segments.T
+    dx, dy = np.sign(x2 - x1), np.sign(y2 - y1)
+    lengths = np.maximum(abs(x2 - x1), abs(y2 - y1)) + 1
+    starts = np.cumsum(lengths) - lengths
+    steps = np.arange(lengths.sum()) - np.repeat(starts, lengths)
+    xs = np.repeat(x1, lengths) + np.repeat(dx, lengths) * steps
+    ys = np.repeat(y1, lengths) + np.repeat(dy, lengths) * steps
+    return xs, ys
+
+
+# The unoccupied floor cells of each room, so that things can be placed without trial and error.
+# The free cells are kept both per room and all together, each list with the position of every cell in it, so that a
+# cell is taken out of both with a swap-remove in O(1).
+class FreeCells:
+    def __init__(self, rooms: list[Room | Junction], rng: random.Random):
+        self.rng = rng
+        self.rooms = [room for room in rooms if isinstance(room, Room)]
+        self.cells = {
+            room: [(x, y) for x in range(room.x1 + 1, room.x2) for y in range(room.y1 + 1, room.y2)]
+            for room in self.rooms
+        }
+        self.room_of = {cell: room for room, cells in self.cells.items() for cell in cells}
+        self.in_room = {cell: i for cells in self.cells.values() for i, cell in enumerate(cells)}
+        self.all = list(self.room_of)
+        self.in_all = {cell: i for i, cell in enumerate(self.all)}
+
+    # Take a random free cell from the room, or None if the room is full.
+    def take_in_room(self, room: Room) -> tuple[int, int] | None:
+        cells = self.cells[room]
+        if not cells:
+            return None
+        cell = cells[self.rng.randrange(len(cells))]
+        self._remove(cell)
+        return cell
+
+    # Take a random free cell from any room, or None if all rooms are full. Every free cell has the same odds, so
+    # bigger rooms are more likely to get something.
+    def take(self) -> tuple[int, int] | None:
+        if not self.all:
+            return None
+        cell = self.all[self.rng.randrange(len(self.all))]
+        self._remove(cell)
+        return cell
+
+    # Replace the cell with the last one of each list.
+    def _remove(self, cell: tuple[int, int]) -> None:
+        for cells, position in ((self.cells[self.room_of[cell]], self.in_room), (self.all, self.in_all)):
+            i = position.pop(cell)
+            last = cells.pop()
+            if last != cell:
+                cells[i] = last
+                position[last] = i
+
+
+def place_gold(room: Room, level: Level, free: FreeCells, rng: random.Random) -> None:
+    if not (spot := free.take_in_room(room)):
+        return
+    x, y = spot
     gold = Item(x=x, y=y, glyph=Glyph.GOLD, name='gold', gold=rng.randint(1, 50 + 10 * level.depth) + 1)
     level.entities.add(gold)
 
 
-def place_monster(room: Room, level: Level) -> None:
-    x, y = find_empty_spot_in_room(room, level)
+def place_monster(room: Room, level: Level, free: FreeCells, rng: random.Random) -> None:
+    if not (spot := free.take_in_room(room)):
+        return
+    x, y = spot
     extra_hd = max(0, level.depth - 26)
-    monster_types, weights = get_monster_types(level.depth)
-    monster_type = rng.choices(monster_types, weights).pop()
-    monster = monster_type.spawn(x, y, extra_hd)
+    monster_type = monster_table(level.depth).sample(rng)
+    monster = monster_type.spawn(x, y, extra_hd, rng)
     level.entities.add(monster)
 
 
-def place_item(all_rooms: list[Room | Junction], level: Level) -> None:
-    x, y = find_empty_spot(all_rooms, level)
-    categories, weights = get_item_categories()
-    category = rng.choices(categories, weights).pop()
-    item_types, weights = category.get_item_types()
-    item_type = rng.choices(item_types, weights).pop()
+def place_item(level: Level, free: FreeCells, rng: random.Random) -> None:
+    if not (spot := free.take()):
+        return
+    x, y = spot
+    item_type = item_table().sample(rng)
     item = item_type.spawn(x, y)
     if isinstance(item, ArmorItem):
         r = rng.random()
@@ -278,44 +374,83 @@ def place_item(all_rooms: list[Room | Junction], level: Level) -> None:
     level.entities.add(item)
 
 
-def generate_level(map_width: int, map_height: int, depth: int) -> Level:
-    assert map_width == 80 and map_height == 22
+# A level only depends on its seed: it is drawn from a generator of its own, so it comes out the same whichever thread
+# generates it, and levels can be generated on several threads at once.
+# The map is split into a grid of (columns, rows) cells, by default as many as fit cells of the classic size.
+# Raises ValueError if the map is too small for at least 9 cells, i.e. smaller than 80x20.
+def generate_level(map_width: int, map_height: int, depth: int, seed: int | None = None,
+                   grid: tuple[int, int] | None = None) -> Level:
+    if seed is None:
+        seed = streams.mapgen_seed(depth)
+    cells = Grid(map_width, map_height, *grid).cells if grid else Grid.for_map(map_width, map_height).cells
+    if len(cells) < 9:
+        raise ValueError(f"A {map_width}x{map_height} map is too small: it has {len(cells)} cells, 9 are needed.")
     level = Level(map_width, map_height, depth)
 
-    seed = random.SystemRandom().getrandbits(64)
-    rng.seed(seed)
+    rng = random.Random(seed)
     logger.info("Level seed is 0x%08X", seed)
 
-    junction_indices = rng.choices(range(9), k=rng.randrange(4))
+    # less than 4 junctions in 9 cells
+    junction_indices = set(rng.choices(range(len(cells)), k=rng.randrange(len(cells) * 4 // 9)))
     rooms: list[Room | Junction] = []
-    for i in range(9):
-        cell = Cell(i)
+    for i, cell in enumerate(cells):
         if i in junction_indices:
-            rooms.append(make_junction(cell, level))
+            rooms.append(make_junction(cell, rng))
         else:
-            rooms.append(make_room(cell, level))
+            rooms.append(make_room(cell, rng))
 
-    connect_rooms(rooms, level)
+    passages = connect_rooms(rooms, rng)
+    carve(level, rooms, passages)
+    free = FreeCells(rooms, rng)
 
-    for room in rooms:
-        if isinstance(room, Room):
-            monster_chance = .25
-            if rng.random() < .5:
-                place_gold(room, level)
-                monster_chance = .8
-            if rng.random() < monster_chance:
-                place_monster(room, level)
-
-    for _ in range(9):
-        if rng.random() < .35:
-            place_item(rooms, level)
+    for room in free.rooms:
+        monster_chance = .25
+        if rng.random() < .5:
+            place_gold(room, level, free, rng)
+            monster_chance = .8
+        if rng.random() < monster_chance:
+            place_monster(room, level, free, rng)
 
-    level.stairs_x, level.stairs_y = find_empty_spot(rooms, level)
-    level.tiles[level.stairs_x, level.stairs_y] = Tile.STAIRS
-    do_not_place_here = Item(x=level.stairs_x, y=level.stairs_y, glyph=Glyph.INVALID, name='do_not_place_here')
-    level.entities.add(do_not_place_here)
+    for _ in range(len(cells)):
+        if rng.random() < .35:
+            place_item(level, free, rng)
 
-    level.entry_x, level.entry_y = find_empty_spot(rooms, level)
-    level.entities.remove(do_not_place_here)
+    # with at least 9 cells, enough of them hold rooms of at least 4 free cells each to fit two things per room,
+    # one item per cell, the stairs and the entry
+    stairs, entry = free.take(), free.take()
+    assert stairs and entry
+    level.stairs_x, level.stairs_y = stairs
+    level.set_tile(level.stairs_x, level.stairs_y, Tile.STAIRS)
+    level.entry_x, level.entry_y = entry
 
     return level
+
+
+# Generates the next level on a worker thread while the current one is played, so that it is ready on descent.
+class LevelPregenerator:
+    def __init__(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='procgen')
+        self._key: tuple[int, int, int, int] | None = None
+        self._future: Future[Level] | None = None
+
+    def prefetch(self, map_width: int, map_height: int, depth: int) -> None:
+        # the seed is read here, since the streams may be reseeded before the worker gets to it
+        seed = streams.mapgen_seed(depth)
+        key = (map_width, map_height, depth, seed)
+        if key == self._key:
+            return
+        if self._future:
+            self._future.cancel()
+        self._key = key
+        self._future = self._executor.submit(generate_level, map_width, map_height, depth, seed)
+
+    # Return the requested level, waiting for the worker or generating it right away if it was not prefetched.
+    def take(self, map_width: int, map_height: int, depth: int) -> Level:
+        seed = streams.mapgen_seed(depth)
+        future, self._future = self._future, None
+        key, self._key = self._key, None
+        if future and key == (map_width, map_height, depth, seed):
+            return future.result()
+        if future:
+            future.cancel()
+        return generate_level(map_width, map_height, depth, seed)
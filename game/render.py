@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+import weakref
 from datetime import datetime
-from typing import Literal
+from typing import Any, Literal
 
 import numpy as np
 import tcod
 
 from game.constants import Glyph, Tile
-from game.entity import Actor, Player, article
+from game.entity import Player, article
 from game.inventory import Inventory
 from game.level import Level
 from game.strings import symbol_key, tombstone
@@ -22,24 +23,97 @@ screen_width = map_width
 screen_height = message_lines + map_height + status_lines
 
 
-def render_map(console: tcod.Console, level: Level, offset_y: int, theme: Theme) -> None:
-    visible_map = theme.visible_glyphs[level.tiles]
-    explored_map = theme.explored_glyphs[level.tiles]
-    console.rgb[0:level.width, offset_y:(level.height + offset_y)] = np.select(
-        condlist=[level.visible, level.explored],
-        choicelist=[visible_map, explored_map],
+# The map as drawn in the previous frame, tiles and entities composed together.
+# On each frame only the area of the level marked as changed since the last one is composed again, along with the
+# cells whose entity changed. The level is only referred to weakly, so that it can go once the player leaves it.
+class MapLayer:
+    def __init__(self) -> None:
+        self.level: weakref.ref[Level] | None = None
+        self.theme: Theme | None = None
+        self.tile_layer: np.ndarray[Any, np.dtype[np.void]] = np.zeros(0, dtype=tcod.console.rgb_graphic)
+        self.frame: np.ndarray[Any, np.dtype[np.void]] = np.zeros(0, dtype=tcod.console.rgb_graphic)
+        self.glyphs: dict[tuple[int, int], tuple[int, tuple[int, int, int]]] = {}
+
+    # The layer is kept in the console's own (padded) dtype so it can be copied to the console as a whole.
+    def update(self, level: Level, theme: Theme, dtype: np.dtype[np.void]) -> np.ndarray[Any, np.dtype[np.void]]:
+        changed = level.take_changes()
+        if self.level is None or self.level() is not level or theme is not self.theme or dtype != self.frame.dtype:
+            self._rebuild(level, theme, dtype)
+            changed = None
+        elif changed is not None:
+            self.tile_layer[changed] = _compose_tiles(level, theme, changed)
+            self.frame[changed] = self.tile_layer[changed]
+        glyphs = _entity_glyphs(level, theme)
+        for position in self.glyphs.keys() - glyphs.keys():
+            self.frame[position] = self.tile_layer[position]
+        for position, (ch, fg) in glyphs.items():
+            if self.glyphs.get(position) != (ch, fg) or (changed is not None and _inside(position, changed)):
+                self.frame[position]['ch'] = ch
+                self.frame[position]['fg'] = fg
+        self.glyphs = glyphs
+        return self.frame
+
+    def _rebuild(self, level: Level, theme: Theme, dtype: np.dtype[np.void]) -> None:
+        self.level, self.theme = weakref.ref(level), theme
+        self.tile_layer = _compose_tiles(level, theme, np.s_[:, :]).astype(dtype, order='F')
+        self.frame = self.tile_layer.copy(order='F')
+        self.glyphs = {}
+
+
+def _inside(position: tuple[int, int], area: tuple[slice, slice]) -> bool:
+    x, y = position
+    return bool(area[0].start <= x < area[0].stop and area[1].start <= y < area[1].stop)
+
+
+def _compose_tiles(level: Level, theme: Theme, cells: Any) -> np.ndarray[Any, np.dtype[np.void]]:
+    tiles = level.tiles[cells]
+    composed: np.ndarray[Any, np.dtype[np.void]] = np.select(
+        condlist=[level.visible[cells], level.explored[cells]],
+        choicelist=[theme.visible_glyphs[tiles], theme.explored_glyphs[tiles]],
         default=theme.unexplored,
     )
-
-    for entity in sorted(level.entities, key=lambda en: isinstance(en, Actor)):
-        if level.visible[entity.x, entity.y]:
-            if isinstance(entity, Actor) and entity.glyph == Glyph.MONSTER:
-                assert entity.char is not None
-                if not entity.invisible:
-                    console.print(entity.x, entity.y + offset_y, entity.char, fg=theme.monster_fg)
+    return composed
+
+
+# Character and color of every visible entity, by position. Actors are drawn over items.
+def _entity_glyphs(level: Level, theme: Theme) -> dict[tuple[int, int], tuple[int, tuple[int, int, int]]]:
+    glyphs = {}
+    for item in level.items:
+        if level.visible[item.x, item.y]:
+            char, foreground = theme.entity_glyphs[item.glyph]
+            glyphs[item.x, item.y] = ord(char), foreground
+    for actor in level.actors:
+        if level.visible[actor.x, actor.y]:
+            if actor.glyph == Glyph.MONSTER:
+                assert actor.char is not None
+                if not actor.invisible:
+                    glyphs[actor.x, actor.y] = ord(actor.char), theme.monster_fg
             else:
-                char, foreground = theme.entity_glyphs[entity.glyph]
-                console.print(entity.x, entity.y + offset_y, char, fg=foreground)
+                char, foreground = theme.entity_glyphs[actor.glyph]
+                glyphs[actor.x, actor.y] = ord(char), foreground
+    return glyphs
+
+
+_map_layer = MapLayer()
+
+
+# Levels larger than the map area scroll, keeping the focus (usually the player) in the middle where possible.
+def render_map(console: tcod.Console, level: Level, offset_y: int, theme: Theme,
+               focus: tuple[int, int] = (0, 0)) -> None:
+    rgb = console.rgb
+    frame = _map_layer.update(level, theme, rgb.dtype)
+    x, y, width, height = viewport(level, focus)
+    # copy raw bytes, since copying structured arrays field by field is several times slower
+    raw = np.dtype((np.void, rgb.dtype.itemsize))
+    rgb.view(raw)[0:width, offset_y:(height + offset_y)] = frame[x:(x + width), y:(y + height)].view(raw)
+
+
+# The part of the level shown in the map area, as (x, y, width, height).
+def viewport(level: Level, focus: tuple[int, int]) -> tuple[int, int, int, int]:
+    width, height = min(level.width, map_width), min(level.height, map_height)
+    x = min(max(focus[0] - width // 2, 0), level.width - width)
+    y = min(max(focus[1] - height // 2, 0), level.height - height)
+    return x, y, width, height
 
 
 def render_status(console: tcod.Console, player: Player, level: Level, offset_y: int, theme: Theme) -> None:
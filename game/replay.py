@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import tcod
+
+from game.entity import Player
+from game.game_loop import new_game, next_level
+from game.journal import read_journal
+from game.level import Level
+from game.messages import MessageLog
+from game.state import GameOver, Play, State, handle_event
+
+
+@dataclass(slots=True)
+class Replay:
+    player: Player
+    level: Level
+    log: MessageLog
+    state: State
+    events: int
+
+
+# Play back a recorded game without a console, feeding the key presses to the game states like the game loop does.
+def replay_journal(filename: Path) -> Replay:
+    seed, events = read_journal(filename)
+    return replay_events(seed, events)
+
+
+def replay_events(seed: int, events: list[tcod.event.KeyDown | None]) -> Replay:
+    player, level, log = new_game(seed)
+    replay = Replay(player, level, log, Play(), 0)
+    replay.state.enter(log)
+    for event in events:
+        if isinstance(replay.state, GameOver):
+            break
+        if event is None:
+            # the game was saved and resumed here, as by the main menu and game_loop()
+            replay.state = Play()
+            replay.state.enter(replay.log)
+        else:
+            replay.state = handle_event(replay.state, event, replay.player, replay.level, replay.log)
+        replay.events += 1
+        if replay.level.completed:
+            replay.level = next_level(replay.player, replay.level)
+    return replay
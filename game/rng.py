@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import hashlib
+import random
+from typing import Any
+
+
+# Independent random number streams for the different parts of the game, all derived from one master seed.
+# Each level is generated from its own seed, so the dungeon doesn't depend on what happens during play.
+class RandomStreams:
+    def __init__(self) -> None:
+        self.master_seed = 0
+        self.combat = random.Random()
+        self.ai = random.Random()
+        self.reseed()
+
+    # Start over from the given master seed, or from a random one.
+    def reseed(self, seed: int | None = None) -> None:
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        self.master_seed = seed
+        self.combat.seed(_derive_seed(seed, 'combat'))
+        self.ai.seed(_derive_seed(seed, 'ai'))
+
+    def mapgen_seed(self, depth: int) -> int:
+        return _derive_seed(self.master_seed, f'mapgen:{depth}')
+
+    def getstate(self) -> tuple[Any, ...]:
+        return self.master_seed, self.combat.getstate(), self.ai.getstate()
+
+    def setstate(self, state: tuple[Any, ...]) -> None:
+        master_seed, combat_state, ai_state = state
+        self.master_seed = master_seed
+        self.combat.setstate(combat_state)
+        self.ai.setstate(ai_state)
+
+
+def _derive_seed(master_seed: int, name: str) -> int:
+    digest = hashlib.blake2b(f'{master_seed}:{name}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+# The streams are modified in place and never replaced, so they can be imported directly.
+streams = RandomStreams()
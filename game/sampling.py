@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Sequence
+from fractions import Fraction
+
+
+# Draws items with fixed integer weights in constant time, using Walker's alias method.
+# The table is built with integer arithmetic only, so each item is drawn with probability exactly weight / total.
+class AliasTable[T]:
+    def __init__(self, items: Sequence[T], weights: Sequence[int]):
+        assert len(items) == len(weights) > 0
+        assert all(weight >= 0 for weight in weights) and sum(weights) > 0
+        self.items = list(items)
+        n = len(items)
+        self.total = sum(weights)
+        # every slot holds `total` units, taken from its own item first and then from its alias
+        self.threshold = [weight * n for weight in weights]
+        self.alias = list(range(n))
+        small = [i for i in range(n) if self.threshold[i] < self.total]
+        large = [i for i in range(n) if self.threshold[i] >= self.total]
+        while small and large:
+            i, j = small.pop(), large[-1]
+            self.alias[i] = j
+            self.threshold[j] -= self.total - self.threshold[i]
+            if self.threshold[j] < self.total:
+                small.append(large.pop())
+        # with exact arithmetic, the slots left over are full
+        assert all(self.threshold[i] == self.total for i in small + large)
+
+    def sample(self, rng: random.Random) -> T:
+        i, r = divmod(rng.randrange(len(self.items) * self.total), self.total)
+        return self.items[i] if r < self.threshold[i] else self.items[self.alias[i]]
+
+    # The exact probability of drawing each item, in order.
+    def probabilities(self) -> list[Fraction]:
+        units = [0] * len(self.items)
+        for i, threshold in enumerate(self.threshold):
+            units[i] += threshold
+            units[self.alias[i]] += self.total - threshold
+        return [Fraction(unit, len(self.items) * self.total) for unit in units]
@@ -1,70 +1,235 @@
 from __future__ import annotations
 
 import logging
-import lzma
-import pickle
-from dataclasses import dataclass
+import os
+import struct
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
+import numpy as np
+
+from game.dungeon import Dungeon, freeze
 from game.entity import Player
+from game.journal import Journal
 from game.level import Level
 from game.messages import MessageLog
+from game.rng import streams
+from game.schema import SCHEMA, SaveFile
+from game.timeline import TURN
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True, slots=True)
-class SaveFile:
-    player: Player
-    level: Level
-    log: MessageLog
-
-
-def save_game(filename: Path, player: Player, level: Level, log: MessageLog) -> None:
-    savefile = SaveFile(player, level, log)
+def save_game(filename: Path, player: Player, dungeon: Dungeon, log: MessageLog, journal_events: int = 0) -> None:
+    levels = dungeon.unsaved()
+    for depth, level in levels:
+        _write(_level_file(filename, depth), HEADER + freeze(level))
+    savefile = SaveFile(player, dungeon.level, log, streams.getstate(), dungeon.cold_depths, journal_events)
     _save(filename, savefile)
+    dungeon.saved(levels)
     logger.info("Savegame saved successfully: '%s'", filename)
 
 
-def load_game(filename: Path) -> tuple[Player, Level, MessageLog] | None:
+# The levels visited before are left in their files until the player returns to them.
+# Also returns the number of key presses the journal had when the game was saved.
+def load_game(filename: Path) -> tuple[Player, Dungeon, MessageLog, int] | None:
     savefile = _load(filename)
     if savefile:
         logger.info("Savegame loaded successfully: '%s'", filename)
         filename.unlink()
-        return savefile.player, savefile.level, savefile.log
+        streams.setstate(savefile.rng_state)
+        dungeon = Dungeon(savefile.level, dict.fromkeys(savefile.depths), read=partial(read_level, filename))
+        return savefile.player, dungeon, savefile.log, savefile.journal_events
     return None
 
 
-HEADER = b'YARC\0\2\0\3'
+# Saves the game every so many turns and on every new level, so that a crash loses little of the game.
+# Encoding the game on the calling thread takes a snapshot of it in a millisecond or so; compressing and writing it
+# happen on a worker thread, so the game does not stall. Writes replace the previous savegame atomically.
+# Each level visited before has a file of its own, which is only written again when the level changed. Those levels
+# are no longer played, so they are frozen on the worker thread too.
+# The journal of the game, if any, is flushed with every save, and the savegame records how far it went.
+# The dungeon is only ever touched on the calling thread: it learns which levels were written when the next save is
+# taken or updated.
+class Autosave:
+    def __init__(self, filename: Path, interval: int = 50, journal: Journal | None = None):
+        self.filename = filename
+        self.interval = interval * TURN
+        self.journal = journal
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='autosave')
+        self._level: Level | None = None
+        self._clock = 0
+        self._discarded = False
+        self._pending: list[tuple[Future[list[tuple[int, Level]]], Dungeon]] = []
+
+    # Save if the player entered a new level or enough turns have passed on this one since the last save.
+    def update(self, player: Player, dungeon: Dungeon, log: MessageLog) -> None:
+        self._collect()
+        level = dungeon.level
+        if not self._discarded and (level is not self._level or level.clock >= self._clock + self.interval):
+            self.save(player, dungeon, log)
+
+    def save(self, player: Player, dungeon: Dungeon, log: MessageLog) -> Future[list[tuple[int, Level]]]:
+        self._collect()
+        level = dungeon.level
+        self._level, self._clock = level, level.clock
+        levels = dungeon.unsaved()
+        journal_events = 0
+        if self.journal:
+            self.journal.flush()
+            journal_events = self.journal.events
+        savefile = SaveFile(player, level, log, streams.getstate(), dungeon.cold_depths, journal_events)
+        serialized, grids = _encode(savefile)
+        written = self._executor.submit(self._write, levels, serialized, grids)
+        self._pending.append((written, dungeon))
+        return written
+
+    # The game is over: delete the savegame, once any pending save has been written.
+    def discard(self) -> None:
+        if not self._discarded:
+            self._discarded = True
+            self._executor.submit(self._delete)
+
+    # Wait for the pending saves.
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._collect()
+
+    # Tell the dungeons about the levels written by the saves that are done.
+    def _collect(self) -> None:
+        while self._pending and self._pending[0][0].done():
+            written, dungeon = self._pending.pop(0)
+            dungeon.saved(written.result())
+
+    # The levels are written before the savegame that refers to them. Returns the levels written: none if the save
+    # failed, in which case they are written again with the next save.
+    def _write(self, levels: list[tuple[int, Level]], serialized: bytes, grids: list[bytes]) -> list[tuple[int, Level]]:
+        try:
+            for depth, level in levels:
+                _write(_level_file(self.filename, depth), HEADER + freeze(level))
+            _write(self.filename, _pack(serialized, grids))
+        except OSError as e:
+            logger.error("Unable to save the game: '%s'", self.filename, exc_info=e)
+            return []
+        logger.debug("Game autosaved: '%s'", self.filename)
+        return levels
+
+    def _delete(self) -> None:
+        try:
+            self.filename.unlink(missing_ok=True)
+            for level_file in self.filename.parent.glob(f'{self.filename.name}.*[0-9]'):
+                level_file.unlink()
+        except OSError as e:
+            logger.error("Unable to delete savegame: '%s'", self.filename, exc_info=e)
+
+
+HEADER = b'YARC\0\7\0\0'
 assert len(HEADER) == 8
 
+# After the header come the size of the compressed section and the number of grids, then the position and size of
+# each grid. The compressed section holds the game except for its NumPy arrays (the grids of the level), which follow
+# uncompressed, each aligned to GRID_ALIGNMENT bytes. Once the file is read, the grids are used in place, except for
+# the visible and explored grids, which are saved packed and unpacked on loading.
+LAYOUT = struct.Struct('<II')
+GRID = struct.Struct('<QQ')
+GRID_ALIGNMENT = 64
+
 
 def _save(filename: Path, savefile: SaveFile) -> None:
-    serialized = pickle.dumps(savefile)
-    compressed = lzma.compress(serialized)
-    with filename.open('wb') as f:
-        f.write(HEADER)
-        f.write(compressed)
+    _write(filename, _pack(*_encode(savefile)))
+
 
+# Encode the game, along with copies of its grids: this is a snapshot of the game.
+def _encode(savefile: SaveFile) -> tuple[bytes, list[bytes]]:
+    grids: list[bytes] = []
+    serialized = SCHEMA.encode(savefile, grids)
+    return serialized, grids
 
+
+# The content of a savegame file.
+def _pack(serialized: bytes, grids: list[bytes]) -> bytes:
+    compressed = zlib.compress(serialized)
+    content = bytearray(HEADER)
+    content += LAYOUT.pack(len(compressed), len(grids))
+    positions = []
+    position = len(content) + GRID.size * len(grids) + len(compressed)
+    for grid in grids:
+        position = -(-position // GRID_ALIGNMENT) * GRID_ALIGNMENT
+        positions.append(position)
+        content += GRID.pack(position, len(grid))
+        position += len(grid)
+    content += compressed
+    for position, grid in zip(positions, grids, strict=True):
+        content += bytes(position - len(content))
+        content += grid
+    return bytes(content)
+
+
+# The grids of the savegame are views of the content, so it should be writable and no longer used. For them to be
+# aligned in memory as they are in the file, the content should start at an aligned address (see _buffer).
+def _unpack(content: bytearray | memoryview) -> SaveFile:
+    view = memoryview(content)
+    compressed_size, n_grids = LAYOUT.unpack_from(view, len(HEADER))
+    start = len(HEADER) + LAYOUT.size
+    table = GRID.iter_unpack(view[start:start + GRID.size * n_grids])
+    grids = [view[position:position + size] for position, size in table]
+    start += GRID.size * n_grids
+    savefile = SCHEMA.decode(zlib.decompress(view[start:start + compressed_size]), grids)
+    assert isinstance(savefile, SaveFile)
+    return savefile
+
+
+# Write to a temporary file first, so that a crash midway leaves the previous savegame intact.
+def _write(filename: Path, content: bytes) -> None:
+    temporary = filename.with_name(filename.name + '.tmp')
+    with temporary.open('wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, filename)
+
+
+# The file of a level visited before, next to the savegame.
+def _level_file(filename: Path, depth: int) -> Path:
+    return filename.with_name(f'{filename.name}.{depth}')
+
+
+# The blob of a level visited before, as frozen by the dungeon.
+def read_level(filename: Path, depth: int) -> bytes:
+    content = _level_file(filename, depth).read_bytes()
+    if content[:len(HEADER)] != HEADER:
+        raise ValueError(f"Incompatible level file for depth {depth}.")
+    return content[len(HEADER):]
+
+
+# A writable buffer of the given size, starting at an address aligned to GRID_ALIGNMENT.
+def _buffer(size: int) -> memoryview:
+    memory = np.empty(size + GRID_ALIGNMENT, dtype=np.uint8)
+    start = -memory.ctypes.data % GRID_ALIGNMENT
+    return memoryview(memory[start:start + size])
+
+
+# The file is read in one go into an aligned buffer, which the grids of the level then share.
 def _load(filename: Path) -> SaveFile | None:
     try:
         with filename.open('rb') as f:
-            header = f.read(len(HEADER))
-            if header != HEADER:
-                logger.debug("Incompatible savegame file: '%s' (wrong header)", filename)
+            content = _buffer(os.fstat(f.fileno()).st_size)
+            if f.readinto(content) != len(content):
+                logger.warning("Unable to read file: '%s'", filename)
                 return None
-            content = f.read()
     except FileNotFoundError:
         logger.debug("Savegame file not found: '%s'", filename)
         return None
     except OSError as e:
         logger.warning("Unable to open file: '%s'", filename, exc_info=e)
         return None
+    if content[:len(HEADER)] != HEADER:
+        logger.debug("Incompatible savegame file: '%s' (wrong header)", filename)
+        return None
     try:
-        savefile = pickle.loads(lzma.decompress(content))
-        assert isinstance(savefile, SaveFile)
-        return savefile
+        return _unpack(content)
     except Exception as e:
         logger.error("Incompatible savegame file: '%s'", filename, exc_info=e)
         return None
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from game import actor_ai, attack, consumable
+from game.bitmask import BitMask
+from game.codec import Codec, Record
+from game.combat import Armor, Stats, Weapon
+from game.constants import Glyph
+from game.entity import Actor, ArmorItem, Item, Player, WeaponItem
+from game.inventory import Inventory
+from game.level import EntitySet, Level
+from game.messages import MessageLog
+from game.timeline import Timeline
+
+
+@dataclass(frozen=True, slots=True)
+class SaveFile:
+    player: Player
+    level: Level
+    log: MessageLog
+    rng_state: tuple[Any, ...]
+    # the levels visited before, which are saved in files of their own
+    depths: tuple[int, ...] = ()
+    # the number of key presses in the journal, which is cut back to them when the game is resumed
+    journal_events: int = 0
+
+
+# The classes that can appear in a savegame. Their position in the schema identifies them in the file, so any
+# change here (as well as to their fields) needs a new savegame header.
+SCHEMA = Codec([
+    Record(SaveFile),
+    Record(Level, ('width', 'height', 'depth', 'tiles', 'visible', 'explored', 'rooms', 'room_grid', 'entities',
+                   'entry_x', 'entry_y', 'stairs_x', 'stairs_y', 'completed', '_fov_origin', '_fov_lit')),
+    Record(BitMask, ('shape', 'bits')),
+    Record(EntitySet, ('entities', 'timeline')),
+    Record(Timeline, ('clock', 'actors')),
+    Record(MessageLog, ('_messages', '_unread')),
+    Record(Glyph),
+    Record(Player),
+    Record(Actor),
+    Record(Stats),
+    Record(Inventory, ('items', 'max_items', '_armor', '_weapon')),
+    Record(Item),
+    Record(ArmorItem),
+    Record(Armor),
+    Record(WeaponItem),
+    Record(Weapon),
+    Record(actor_ai.IdleAI, ()),
+    Record(actor_ai.MeanAI, ()),
+    Record(actor_ai.GreedyAI, ('goal',)),
+    Record(actor_ai.HostileAI, ()),
+    Record(attack.Poison),
+    Record(attack.StealGold),
+    Record(attack.Corrode),
+    Record(attack.StealItem),
+    Record(attack.DrainHealth),
+    Record(attack.DrainLevel),
+    Record(consumable.NoEffect),
+    Record(consumable.Healing),
+    Record(consumable.Poison),
+    Record(consumable.GainStrength),
+    Record(consumable.RestoreStrength),
+    Record(consumable.RaiseLevel),
+    Record(consumable.HoldMonster),
+    Record(consumable.AggravateMonsters),
+    Record(consumable.EnchantArmor),
+    Record(consumable.EnchantWeapon),
+    Record(consumable.RemoveCurse),
+    Record(consumable.MagicMapping),
+    Record(consumable.Identify),
+    Record(consumable.Food),
+])
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Protocol
+
+import game.turn
+from game.action import Action, BumpAction, IdentifyAction, StairsAction, UseAction, WaitAction
+from game.constants import Glyph
+from game.entity import Item, Player
+from game.game_loop import new_game, next_level
+from game.level import Level
+from game.messages import MessageLog
+from game.pathfinding import DistanceMap
+from game.state import IdentifyItem
+
+
+# Decides what the player does next, in place of the keyboard.
+class Policy(Protocol):
+    def act(self, player: Player, level: Level, log: MessageLog) -> Action:
+        pass
+
+    # Answer the prompt of a scroll of identify.
+    def identify(self, player: Player, level: Level, log: MessageLog) -> Item:
+        pass
+
+
+@dataclass(frozen=True, slots=True)
+class GameResult:
+    depth: int
+    turns: int
+    gold: int
+    cause_of_death: str | None
+
+
+# Play a game without a console or any events, following the same rules as the game loop.
+class Simulation:
+    def __init__(self, policy: Policy, player: Player, level: Level, log: MessageLog):
+        self.policy = policy
+        self.player, self.level, self.log = player, level, log
+        self.turns = 0
+
+    @classmethod
+    def new_game(cls, policy: Policy, seed: int | None = None) -> Simulation:
+        return cls(policy, *new_game(seed))
+
+    @property
+    def game_over(self) -> bool:
+        return self.player.stats.hp == 0
+
+    # Perform a single player action, and let the monsters act if the turn ended.
+    def step(self) -> None:
+        assert not self.game_over
+        action = self.policy.act(self.player, self.level, self.log)
+        end_turn, next_state, cost = action.perform(self.player, self.level, self.log)
+        if isinstance(next_state, IdentifyItem):
+            item = self.policy.identify(self.player, self.level, self.log)
+            self.player.inventory.remove_item(next_state.scroll)
+            end_turn, _, cost = IdentifyAction(item).perform(self.player, self.level, self.log)
+        if end_turn:
+            game.turn.end_turn(self.player, self.level, self.log, cost)
+            self.turns += 1
+        if self.level.completed and not self.game_over:
+            self.level = next_level(self.player, self.level)
+
+    # Play until the player dies or the given number of actions has been performed.
+    def run(self, max_actions: int) -> GameResult:
+        for _ in range(max_actions):
+            if self.game_over:
+                break
+            self.step()
+        return self.result()
+
+    def result(self) -> GameResult:
+        return GameResult(
+            depth=self.level.depth,
+            turns=self.turns,
+            gold=self.player.gold,
+            cause_of_death=self.player.cause_of_death,
+        )
+
+
+# A simple bot that heads straight for the stairs, fighting anything in its way.
+# It eats when hungry and drinks healing potions when badly hurt.
+class StairsBot(Policy):
+    def __init__(self) -> None:
+        self._level: Level | None = None
+        self._stairs: DistanceMap | None = None
+
+    def act(self, player: Player, level: Level, log: MessageLog) -> Action:
+        if player.hunger_clock < 150 and (food := _find_item(player, Glyph.FOOD)):
+            return UseAction(food)
+        if player.stats.hp < player.stats.max_hp // 3 and (potion := _find_item(player, Glyph.POTION, "healing")):
+            return UseAction(potion)
+        for actor in level.get_actors_near(player.x, player.y, 1):
+            if actor is not player:
+                if level.is_connected(player.x, player.y, actor.x, actor.y):
+                    return BumpAction(actor.x - player.x, actor.y - player.y)
+        if (player.x, player.y) == (level.stairs_x, level.stairs_y):
+            return StairsAction()
+        if self._stairs is None or level is not self._level:
+            self._level = level
+            self._stairs = DistanceMap((level.stairs_x, level.stairs_y), level.graph)
+        path = self._stairs.path_from((player.x, player.y))
+        if len(path) < 2:
+            return WaitAction()
+        x, y = path[1]
+        return BumpAction(x - player.x, y - player.y)
+
+    def identify(self, player: Player, level: Level, log: MessageLog) -> Item:
+        unidentified = [item for item in player.inventory.items if not item.identified]
+        return unidentified[0] if unidentified else player.inventory.items[0]
+
+
+def _find_item(player: Player, glyph: Glyph, name: str = "") -> Item | None:
+    for item in player.inventory.items:
+        if item.glyph == glyph and name in item.name:
+            return item
+    return None
@@ -38,22 +38,31 @@ from game.version import version_string
 
 
 class State:
+    # Called when the state becomes the current one, before it is rendered or handed any event.
+    def enter(self, log: MessageLog) -> None:
+        pass
+
     def render(self, console: tcod.Console, player: Player, level: Level, log: MessageLog, theme: Theme) -> None:
         raise NotImplementedError()
 
+    # Return the next state, or self if the event changed nothing on screen.
+    # The game loop only redraws the screen when a different state is returned.
     def event(self, event: tcod.event.Event, player: Player, level: Level, log: MessageLog) -> State:
         raise NotImplementedError()
 
 
 class Play(State):
     def __init__(self) -> None:
-        self.messages: list[str] | None = None
+        self.messages: list[str] = []
+
+    # The messages shown are marked read on entering the state rather than when rendering it, so that the game plays
+    # out the same however often the screen is drawn (e.g. when replaying a journal, where it never is).
+    def enter(self, log: MessageLog) -> None:
+        self.messages = log.get_unread(message_lines)
 
     def render(self, console: tcod.Console, player: Player, level: Level, log: MessageLog, theme: Theme) -> None:
-        if self.messages is None:
-            self.messages = log.get_unread(message_lines)
         render_messages(console, self.messages, 0, theme)
-        render_map(console, level, message_lines, theme)
+        render_map(console, level, message_lines, theme, (player.x, player.y))
         render_status(console, player, level, message_lines + map_height, theme)
 
     def event(self, event: tcod.event.Event, player: Player, level: Level, log: MessageLog) -> State:
@@ -107,10 +116,18 @@ class Play(State):
         return self
 
 
+# Hand an event to the current state, and enter the state it returns if that is a different one.
+def handle_event(state: State, event: tcod.event.Event, player: Player, level: Level, log: MessageLog) -> State:
+    next_state = state.event(event, player, level, log)
+    if next_state is not state:
+        next_state.enter(log)
+    return next_state
+
+
 def do_action(action: Action, player: Player, level: Level, log: MessageLog) -> State:
-    end_turn, next_state = action.perform(player, level, log)
+    end_turn, next_state, cost = action.perform(player, level, log)
     if end_turn:
-        game.turn.end_turn(player, level, log)
+        game.turn.end_turn(player, level, log, cost)
     if player.stats.hp == 0:
         log.append("You die...")
         next_state = GameOver()
@@ -124,14 +141,15 @@ def do_action(action: Action, player: Player, level: Level, log: MessageLog) ->
 class More(State):
     def __init__(self, next_state: State | None = None) -> None:
         self.next_state = next_state
-        self.messages: list[str] | None = None
+        self.messages: list[str] = []
+
+    def enter(self, log: MessageLog) -> None:
+        self.messages = log.get_unread(message_lines)
+        self.messages[-1] += "--More--"
 
     def render(self, console: tcod.Console, player: Player, level: Level, log: MessageLog, theme: Theme) -> None:
-        if self.messages is None:
-            self.messages = log.get_unread(message_lines)
-            self.messages[-1] += "--More--"
         render_messages(console, self.messages, 0, theme)
-        render_map(console, level, message_lines, theme)
+        render_map(console, level, message_lines, theme, (player.x, player.y))
         render_status(console, player, level, message_lines + map_height, theme)
 
     def event(self, event: tcod.event.Event, player: Player, level: Level, log: MessageLog) -> State:
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from game.entity import Actor
+
+# Time is counted in ticks. An action normally costs a turn, and takes an actor moving at speed NORMAL_SPEED
+# (a percentage) exactly that long. A turn divides evenly for speeds of 50, 150, 200, 300...
+TURN = 12
+NORMAL_SPEED = 100
+
+
+# The time an action of the given cost keeps an actor of the given speed busy.
+def delay(cost: int, speed: int) -> int:
+    return max(1, cost * NORMAL_SPEED // speed)
+
+
+# The actors of a level, in a heap keyed by the time of their next action.
+# Actors due at the same time act in the order they joined the level, so when everyone moves at the same speed
+# the order is the same as looping over the level's actors.
+# Actors leaving the level leave their entry behind in the heap, to be skipped when it comes up.
+class Timeline:
+    def __init__(self) -> None:
+        self._clear()
+
+    def _clear(self) -> None:
+        self.clock = 0
+        self._heap: list[tuple[int, int, Actor]] = []
+        self._order: dict[Actor, int] = {}
+        self._due: dict[Actor, int] = {}
+        self._joined = 0
+
+    # Only the due times are saved: the order is given by the list of actors, and stale entries are dropped.
+    def __getstate__(self) -> dict[str, Any]:
+        return {'clock': self.clock, 'actors': [(actor, self._due.get(actor)) for actor in self._order]}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._clear()
+        self.clock = state['clock']
+        for actor, time in state['actors']:
+            self.join(actor)
+            if time is not None:
+                self.schedule(actor, time)
+
+    def join(self, actor: Actor) -> None:
+        self._order[actor] = self._joined
+        self._joined += 1
+
+    def leave(self, actor: Actor) -> None:
+        del self._order[actor]
+        self._due.pop(actor, None)
+
+    def is_scheduled(self, actor: Actor) -> bool:
+        return actor in self._due
+
+    # Schedule the next action of an actor, unless it already has one scheduled.
+    def schedule(self, actor: Actor, time: int) -> None:
+        if actor in self._order and actor not in self._due:
+            self._due[actor] = time
+            heapq.heappush(self._heap, (time, self._order[actor], actor))
+
+    # Take the next actor due strictly before the given time, and move the clock to its time.
+    def pop(self, before: int) -> Actor | None:
+        while self._heap and self._heap[0][0] < before:
+            time, order, actor = heapq.heappop(self._heap)
+            if self._due.get(actor) == time and self._order.get(actor) == order:
+                del self._due[actor]
+                self.clock = time
+                return actor
+        return None
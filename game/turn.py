@@ -4,28 +4,38 @@ from game.dice import roll
 from game.entity import Player
 from game.level import Level
 from game.messages import MessageLog
+from game.timeline import TURN, delay
 
 
 def wake_up_room(room: tuple[int, int, int, int] | None, level: Level) -> None:
     assert room is not None
-    x1, y1, x2, y2 = room
-    actors_in_room = {actor for actor in level.actors if actor.ai and x1 <= actor.x <= x2 and y1 <= actor.y <= y2}
+    actors_in_room = [actor for actor in level.get_actors_in(*room) if actor.ai]
     for actor in actors_in_room:
         assert actor.ai is not None
         actor.ai.on_disturbed(actor, level)
+        level.wake(actor)
 
 
-def end_turn(player: Player, level: Level, log: MessageLog) -> None:
+# Let the actors act until the player's next action, which comes once the given cost has been paid.
+def end_turn(player: Player, level: Level, log: MessageLog, cost: int = TURN) -> None:
     level.update_fov(player.x, player.y)
     _heal_player(player)
     _hunger_clock(player, log)
-    for actor in level.actors:
+    timeline = level.timeline
+    player_next = timeline.clock + delay(cost, player.speed)
+    # Dormant actors are not scheduled since they would only wait, except next to the player where they may be
+    # disturbed.
+    for nearby in level.get_actors_near(player.x, player.y, 1):
+        if nearby.ai:
+            timeline.schedule(nearby, timeline.clock)
+    while player.stats.hp > 0 and (actor := timeline.pop(player_next)):
         if actor.ai:
-            if player.stats.hp == 0:
-                break
-            actor.ai.take_turn(actor, level, player).perform(actor, level, log)
+            result = actor.ai.take_turn(actor, level, player).perform(actor, level, log)
             if actor.x - 1 <= player.x <= actor.x + 1 and actor.y - 1 <= player.y <= actor.y + 1:
                 actor.ai.on_disturbed(actor, level)
+            # actors may have left the level (e.g. a leprechaun stealing gold), or fallen dormant
+            level.wake(actor, delay(result.cost, actor.speed))
+    timeline.clock = player_next
 
 
 def _heal_player(player: Player) -> None:
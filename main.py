@@ -3,11 +3,13 @@ from __future__ import annotations
 
 import argparse
 import logging
+import time
 from pathlib import Path
 from typing import Any, Never
 
 ASSETS = Path('assets')
 SAVEFILE = Path('yarc.sav')
+JOURNAL = Path('yarc.jnl')
 
 
 def parse_command_line() -> dict[str, Any]:
@@ -23,6 +25,9 @@ def parse_command_line() -> dict[str, Any]:
         dest='loglevel',
         help="set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)",
     )
+    parser.add_argument(
+        '--replay', metavar='FILE', type=Path, help="replay a recorded game without a window, and report the timing"
+    )
     parser.add_argument('--scale', type=int, default=1, help="adjust the graphical scale factor by an integer value")
     parser.add_argument(
         '--theme',
@@ -49,10 +54,22 @@ def main() -> Never:
     print(f"Y.A.R.C. version {version_string.lstrip('v')}")
     if args['version']:
         raise SystemExit()
+    if args['replay']:
+        replay(args['replay'])
     # Import game modules after basic initialization.
     from game.main_menu import show_menu
     install_dir = Path(__file__).parent
-    show_menu(install_dir / ASSETS, SAVEFILE, args['theme'], args['borderless'], args['scale'])
+    show_menu(install_dir / ASSETS, SAVEFILE, JOURNAL, args['theme'], args['borderless'], args['scale'])
+
+
+def replay(journal: Path) -> Never:
+    from game.replay import replay_journal
+    start = time.perf_counter()
+    result = replay_journal(journal)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {result.events} events in {elapsed:.3f} s, ended on depth {result.level.depth}"
+          f" with {result.player.stats.hp} hp")
+    raise SystemExit()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,14 @@
+import pytest
+
+from game.combat import Stats
+from game.constants import Glyph
+from game.entity import Actor
+
+
+# A factory for plain monsters, as most tests do not care which.
+@pytest.fixture
+def make_actor():
+    def make_actor(x, y):
+        return Actor(x=x, y=y, glyph=Glyph.MONSTER, char='K', name='kobold',
+                     stats=Stats(max_hp=1, ac=7, hd=1, dmg_dice='1d4', xp=1))
+    return make_actor
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+from game.bitmask import BitMask
+
+
+@pytest.mark.parametrize('shape', [(13, 7), (80, 22), (1, 1)])
+def test_pack_and_unpack(shape):
+    grid = np.asfortranarray(np.random.default_rng(0).integers(0, 2, shape).astype(bool))
+    mask = BitMask.pack(grid)
+    assert len(mask.bits) == -(-grid.size // 8)
+    unpacked = mask.unpack()
+    assert unpacked.dtype == bool and unpacked.flags.f_contiguous and unpacked.flags.writeable
+    assert (unpacked == grid).all()
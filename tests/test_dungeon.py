@@ -0,0 +1,83 @@
+from functools import partial
+
+import numpy as np
+
+import game.save
+from game.dungeon import Dungeon
+from game.game_loop import enter_level, new_game, next_level
+
+
+def descend(player, dungeon, depth):
+    while dungeon.level.depth < depth:
+        level = dungeon.level
+        dungeon.leave(player)
+        dungeon.enter(next_level(player, level))
+
+
+def test_levels_visited_before_are_kept():
+    player, level, log = new_game(0)
+    first = level
+    dungeon = Dungeon(level)
+    descend(player, dungeon, 3)
+    assert dungeon.cold_depths == (1, 2)
+    assert player not in first.actors and player in dungeon.level.actors
+    # leaving a level costs nothing: it is only frozen when saved
+    assert [depth for depth, _ in dungeon.unsaved()] == [1, 2] and dungeon.unsaved()[0][1] is first
+    # the level comes back as it was left
+    dungeon.leave(player)
+    revisited = dungeon.revisit(1)
+    assert revisited is not None
+    dungeon.enter(revisited)
+    assert dungeon.cold_depths == (2, 3)
+    assert revisited is not first and not revisited.completed
+    for grid in ('tiles', 'visible', 'explored'):
+        assert (getattr(revisited, grid) == getattr(first, grid)).all()
+    assert [(e.name, e.x, e.y) for e in revisited.entities] == [(e.name, e.x, e.y) for e in first.entities]
+    assert revisited.clock == first.clock
+    enter_level(player, revisited)
+    assert player in revisited.actors
+
+
+def test_only_changed_levels_are_saved(tmp_path, monkeypatch):
+    filename = tmp_path / 'savegame'
+    player, level, log = new_game(0)
+    dungeon = Dungeon(level, read=partial(game.save.read_level, filename))
+    descend(player, dungeon, 3)
+    written = []
+    write = game.save._write
+
+    def spy(path, content):
+        written.append(path.name)
+        write(path, content)
+
+    monkeypatch.setattr(game.save, '_write', spy)
+    game.save.save_game(filename, player, dungeon, log)
+    assert written == ['savegame.1', 'savegame.2', 'savegame']
+    # once saved, the levels are only kept on disk
+    assert dungeon.unsaved() == [] and dungeon.cold_depths == (1, 2)
+    written.clear()
+    game.save.save_game(filename, player, dungeon, log)
+    assert written == ['savegame']
+    assert dungeon.revisit(1).depth == 1
+    # a loaded game reads the levels visited before from their files, and only when the player returns to them
+    loaded = game.save.load_game(filename)
+    assert loaded is not None
+    player, dungeon, log, _ = loaded
+    assert dungeon.level.depth == 3 and dungeon.cold_depths == (1, 2) and dungeon.unsaved() == []
+    (tmp_path / 'savegame.1').unlink()
+    assert dungeon.revisit(1) is None
+    dungeon.leave(player)
+    level = dungeon.revisit(2)
+    assert level is not None and np.any(level.explored)
+    dungeon.enter(level)
+    written.clear()
+    autosave = game.save.Autosave(filename)
+    autosave.update(player, dungeon, log)
+    assert [depth for depth, _ in dungeon.unsaved()] == [3]
+    autosave.close()
+    assert written == ['savegame.3', 'savegame']
+    assert dungeon.unsaved() == []
+    autosave = game.save.Autosave(filename)
+    autosave.discard()
+    autosave.close()
+    assert list(tmp_path.iterdir()) == []
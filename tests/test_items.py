@@ -0,0 +1,30 @@
+import random
+
+from game.entity import ArmorItem, WeaponItem
+from game.items import item_categories
+from game.monsters import monsters
+
+
+def test_spawned_items_do_not_share_mutable_state():
+    for category in item_categories:
+        for item_type in category.item_types:
+            first, second = item_type.spawn(0, 0), item_type.spawn(1, 1)
+            if isinstance(first, ArmorItem):
+                assert first.armor is not second.armor
+                first.armor.plus_ac += 1
+                assert first.armor.ac != second.armor.ac
+            elif isinstance(first, WeaponItem):
+                assert first.weapon is not second.weapon
+                assert first.weapon.base_dmg == second.weapon.base_dmg == item_type.component.base_dmg
+            else:
+                assert first.consumable is second.consumable is item_type.component
+
+
+def test_spawned_monsters():
+    rng = random.Random(0)
+    for monster_type in monsters:
+        first, second = monster_type.spawn(0, 0, 2, rng), monster_type.spawn(1, 1, 0, rng)
+        assert first.stats is not second.stats
+        assert first.stats.hp == first.stats.max_hp
+        assert first.stats.hd == monster_type.stats.hd + 2 and first.stats.ac == monster_type.stats.ac - 2
+        assert first.stats.base_dmg is monster_type.stats.base_dmg
@@ -0,0 +1,140 @@
+import random
+
+import numpy as np
+import tcod
+
+import game.save
+import game.theme
+from game.dungeon import Dungeon
+from game.game_loop import new_game, next_level
+from game.journal import Journal, read_journal
+from game.render import screen_height, screen_width
+from game.replay import replay_journal
+from game.rng import streams
+from game.state import GameOver, More, Play, State, handle_event
+
+KEYS = [
+    tcod.event.KeySym.h, tcod.event.KeySym.j, tcod.event.KeySym.k, tcod.event.KeySym.l,
+    tcod.event.KeySym.y, tcod.event.KeySym.u, tcod.event.KeySym.b, tcod.event.KeySym.n,
+    tcod.event.KeySym.PERIOD, tcod.event.KeySym.COMMA, tcod.event.KeySym.SPACE, tcod.event.KeySym.ESCAPE,
+    tcod.event.KeySym.q, tcod.event.KeySym.r, tcod.event.KeySym.e, tcod.event.KeySym.a,
+]
+
+
+# The session is drawn after every key press, like the game loop does at most; the replay is never drawn.
+def test_replay_reproduces_session(tmp_path):
+    filename = tmp_path / 'yarc.jnl'
+    keys = random.Random(0)
+    console = tcod.console.Console(screen_width, screen_height, order='F')
+    player, level, log = new_game(99)
+    state: State = Play()
+    state.enter(log)
+    with Journal.create(filename, streams.master_seed) as journal:
+        for _ in range(2000):
+            state.render(console, player, level, log, game.theme.default)
+            if isinstance(state, GameOver):
+                break
+            mod = tcod.event.Modifier.LSHIFT if keys.random() < 0.05 else tcod.event.Modifier.NONE
+            event = tcod.event.KeyDown(0, keys.choice(KEYS), mod)
+            journal.record(event)
+            state = handle_event(state, event, player, level, log)
+            if level.completed:
+                level = next_level(player, level)
+
+    seed, events = read_journal(filename)
+    assert seed == 99
+    replay = replay_journal(filename)
+    assert replay.events == len(events)
+    assert (replay.player.x, replay.player.y, replay.player.stats.hp) == (player.x, player.y, player.stats.hp)
+    assert replay.level.depth == level.depth and type(replay.state) is type(state)
+    assert replay.log.unread == log.unread
+    assert np.array_equal(replay.level.explored, level.explored)
+    assert replay.log.get_latest(20) == log.get_latest(20)
+
+
+# Press random keys like test_replay_reproduces_session, until the given condition holds.
+def play(keys, journal, state, player, dungeon, log, until):
+    while not until(state) and not isinstance(state, GameOver):
+        event = tcod.event.KeyDown(0, keys.choice(KEYS), tcod.event.Modifier.NONE)
+        journal.record(event)
+        state = handle_event(state, event, player, dungeon.level, log)
+        if dungeon.level.completed:
+            level = dungeon.level
+            dungeon.leave(player)
+            dungeon.enter(next_level(player, level))
+    return state
+
+
+# A game saved while a prompt is on screen resumes in the Play state, and so must its replay.
+def test_replay_after_resuming_mid_prompt(tmp_path):
+    filename, savefile = tmp_path / 'yarc.jnl', tmp_path / 'savegame'
+    keys = random.Random(3)
+    player, level, log = new_game(3)
+    dungeon = Dungeon(level)
+    state: State = Play()
+    state.enter(log)
+    journal = Journal.create(filename, 3)
+    state = play(keys, journal, state, player, dungeon, log, lambda state: isinstance(state, More))
+    assert isinstance(state, More)
+    # quit, as the game loop does
+    autosave = game.save.Autosave(savefile, journal=journal)
+    autosave.save(player, dungeon, log)
+    autosave.close()
+    journal.close()
+    loaded = game.save.load_game(savefile)
+    assert loaded is not None
+    player, dungeon, log, events = loaded
+    journal = Journal.resume(filename, 3, events)
+    assert journal is not None
+    state = Play()
+    state.enter(log)
+    turns = iter(range(300))
+    state = play(keys, journal, state, player, dungeon, log, lambda state: next(turns, None) is None)
+    journal.close()
+    replay = replay_journal(filename)
+    assert replay.events == journal.events
+    assert (replay.player.x, replay.player.y, replay.player.stats.hp) == (player.x, player.y, player.stats.hp)
+    assert replay.level.depth == dungeon.level.depth and replay.level.clock == dungeon.level.clock
+    assert type(replay.state) is type(state)
+
+
+def test_resume_checks_seed(tmp_path):
+    filename = tmp_path / 'yarc.jnl'
+    Journal.create(filename, 1).close()
+    assert Journal.resume(filename, 2, 0) is None
+    journal = Journal.resume(filename, 1, 0)
+    assert journal is not None
+    journal.record(tcod.event.KeyDown(0, tcod.event.KeySym.h, tcod.event.Modifier.NONE))
+    journal.close()
+    seed, events = read_journal(filename)
+    assert seed == 1
+    # a resumed game starts with a marker for the replay
+    assert events[0] is None
+    assert [(event.sym, event.mod) for event in events[1:]] == [(tcod.event.KeySym.h, tcod.event.Modifier.NONE)]
+
+
+# After a crash, the game resumes from the last autosave, and the key presses recorded since are played again.
+def test_resume_from_autosave(tmp_path):
+    filename, savefile = tmp_path / 'yarc.jnl', tmp_path / 'savegame'
+    h, j, k = (tcod.event.KeyDown(0, sym, tcod.event.Modifier.NONE)
+               for sym in (tcod.event.KeySym.h, tcod.event.KeySym.j, tcod.event.KeySym.k))
+    player, level, log = new_game(5)
+    journal = Journal.create(filename, 5)
+    for _ in range(3):
+        journal.record(h)
+    autosave = game.save.Autosave(savefile, journal=journal)
+    autosave.save(player, Dungeon(level), log)
+    autosave.close()
+    # the key presses up to the save are on disk even if the game crashes
+    assert len(read_journal(filename)[1]) == 3
+    journal.record(j)
+    journal.record(j)
+    journal.close()
+    loaded = game.save.load_game(savefile)
+    assert loaded is not None and loaded[3] == 3
+    assert Journal.resume(filename, 5, 6) is None
+    journal = Journal.resume(filename, 5, loaded[3])
+    assert journal is not None and journal.events == 4
+    journal.record(k)
+    journal.close()
+    assert [event and event.sym for event in read_journal(filename)[1]] == [h.sym, h.sym, h.sym, None, k.sym]
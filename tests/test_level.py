@@ -0,0 +1,147 @@
+import random
+
+import numpy as np
+import pytest
+
+import game.level
+import game.procgen
+from benchmarks.bench_fov import reference_fov
+from game.combat import Stats
+from game.constants import Glyph, Tile
+from game.entity import Actor, Item
+
+
+@pytest.fixture
+def level():
+    level = game.level.Level(10, 5, 1)
+    level.tiles[:, :] = Tile.FLOOR
+    return level
+
+
+def make_item(x, y):
+    return Item(x=x, y=y, glyph=Glyph.GOLD, name='gold', gold=1)
+
+
+def test_add_remove(level, make_actor):
+    actor = make_actor(1, 1)
+    item = make_item(1, 1)
+    level.entities.add(actor)
+    level.entities.add(item)
+    assert len(level.entities) == 2
+    assert level.get_entities_at(1, 1) == {actor, item}
+    assert level.get_actor_at(1, 1) is actor
+    assert level.get_item_at(1, 1) is item
+    level.entities.remove(actor)
+    assert actor not in level.entities
+    assert level.get_actor_at(1, 1) is None
+    assert level.get_item_at(1, 1) is item
+    level.entities.remove(item)
+    assert level.is_empty_at(1, 1)
+    with pytest.raises(KeyError):
+        level.entities.remove(item)
+
+
+def test_add_twice(level):
+    item = make_item(2, 2)
+    level.entities.add(item)
+    level.entities.add(item)
+    assert len(level.entities) == 1
+    level.entities.remove(item)
+    assert level.is_empty_at(2, 2)
+
+
+def test_move(level, make_actor):
+    actor = make_actor(1, 1)
+    level.entities.add(actor)
+    level.move_entity(actor, 2, 1)
+    assert (actor.x, actor.y) == (2, 1)
+    assert level.get_actor_at(1, 1) is None
+    assert level.get_actor_at(2, 1) is actor
+    level.entities.remove(actor)
+    assert level.is_empty_at(2, 1)
+
+
+def test_typed_views(level, make_actor):
+    actors = [make_actor(i, 0) for i in range(5)]
+    items = [make_item(i, 1) for i in range(5)]
+    for actor, item in zip(actors, items):
+        level.entities.add(item)
+        level.entities.add(actor)
+    assert list(level.actors) == actors
+    assert list(level.items) == items
+    level.entities.remove(actors[2])
+    level.entities.remove(items[0])
+    assert list(level.actors) == actors[:2] + actors[3:]
+    assert list(level.items) == items[1:]
+    level.entities.add(actors[2])
+    assert list(level.actors) == actors[:2] + actors[3:] + [actors[2]]
+
+
+def test_cached_graph(level):
+    level.tiles[3, :] = Tile.V_WALL
+    graph = level.graph
+    assert level.graph is graph
+    assert level.cost[3, 0] == 0 and level.cost[2, 0] == 1
+    with pytest.raises(ValueError):
+        level.tiles[3, 2] = Tile.DOOR
+    level.set_tile(3, 2, Tile.DOOR)
+    assert level.cost[3, 2] == 1
+    assert level.graph is not graph
+
+
+def test_update_fov():
+    rng = random.Random(0)
+    for _ in range(5):
+        level = game.procgen.generate_level(80, 22, 1)
+        explored = np.zeros_like(level.explored)
+        cells = [(int(x), int(y)) for x, y in np.argwhere(level.walkable)]
+        rng.shuffle(cells)
+        for x, y in cells[:200]:
+            level.update_fov(x, y)
+            visible = reference_fov(level, x, y)
+            explored |= visible
+            assert np.array_equal(level.visible, visible)
+            assert np.array_equal(level.explored, explored)
+            room = level.get_room_at(x, y)
+            assert room == next((r for r in level.rooms if r[0] <= x <= r[2] and r[1] <= y <= r[3]), None)
+
+
+# With more actors than ActorTable.MIN_VECTORIZED, queries go through the NumPy columns; they must match a plain loop.
+@pytest.mark.parametrize('n_actors', [5, 600])
+def test_actors_in_area(n_actors, make_actor):
+    rng = random.Random(n_actors)
+    level = game.level.Level(40, 20, 1)
+    level.tiles[:, :] = Tile.FLOOR
+    table = level.entities.actor_table
+    actors = [make_actor(rng.randrange(40), rng.randrange(20)) for _ in range(n_actors)]
+    for actor in actors:
+        level.entities.add(actor)
+
+    def check():
+        x1, y1 = rng.randrange(40), rng.randrange(20)
+        x2, y2 = rng.randrange(x1, 40), rng.randrange(y1, 20)
+        expected = [actor for actor in level.actors if x1 <= actor.x <= x2 and y1 <= actor.y <= y2]
+        assert level.get_actors_in(x1, y1, x2, y2) == expected
+        expected = [actor for actor in level.actors if abs(actor.x - x1) <= 2 and abs(actor.y - y1) <= 2]
+        assert level.get_actors_near(x1, y1, 2) == expected
+
+    for _ in range(n_actors):
+        if rng.random() < 0.5:
+            level.entities.remove(actors.pop(rng.randrange(len(actors))))
+            actors.append(make_actor(rng.randrange(40), rng.randrange(20)))
+            level.entities.add(actors[-1])
+        else:
+            level.move_entity(rng.choice(actors), rng.randrange(40), rng.randrange(20))
+        check()
+    assert (len(table.rows) - table.dead >= table.MIN_VECTORIZED) == (n_actors > table.MIN_VECTORIZED)
+    # removing most actors compacts the table, past MIN_VECTORIZED dead rows
+    rows = len(table.rows)
+    for actor in actors[:-3]:
+        level.entities.remove(actor)
+    if n_actors > table.MIN_VECTORIZED:
+        assert len(table.rows) < rows - table.MIN_VECTORIZED
+        assert table.dead < table.MIN_VECTORIZED
+    assert len(table.rows) - table.dead == 3
+    assert level.get_actors_in(0, 0, 39, 19) == actors[-3:]
+    for _ in range(20):
+        check()
@@ -145,3 +145,29 @@ def test_bending_passage(passage):
     assert path == [(1, 2), (1, 1), (2, 1)]
     path = game.pathfinding.find_path((2, 1), (1, 2), passage)
     assert path == [(2, 1), (1, 1), (1, 2)]
+
+
+def path_cost(path, cost):
+    total = 0
+    for (x1, y1), (x2, y2) in zip(path, path[1:]):
+        assert cost[x2, y2] and max(abs(x2 - x1), abs(y2 - y1)) == 1
+        if x1 != x2 and y1 != y2:
+            assert cost[x1, y2] and cost[x2, y1]
+            total += 3
+        else:
+            total += 2
+    return total
+
+
+@pytest.mark.parametrize('fixture', ['empty', 'room', 'door1', 'door2', 'passage'])
+def test_distance_map(fixture, request):
+    cost = request.getfixturevalue(fixture)
+    graph = game.pathfinding.create_graph(cost)
+    cells = [tuple(int(i) for i in e) for e in np.argwhere(cost)]
+    for goal in cells:
+        distance_map = game.pathfinding.DistanceMap(goal, graph)
+        for start in cells:
+            path = distance_map.path_from(start)
+            assert path[0] == start and path[-1] == goal
+            assert path_cost(path, cost) == distance_map.distance[start]
+            assert path_cost(path, cost) == path_cost(game.pathfinding.find_path(start, goal, cost), cost)
@@ -0,0 +1,78 @@
+import random
+
+import numpy as np
+import pytest
+
+from game.constants import Tile
+from game.level import Level
+from game.procgen import (
+    FreeCells,
+    Grid,
+    Junction,
+    Room,
+    carve,
+    connect_rooms,
+    make_junction,
+    generate_level,
+    make_room,
+)
+
+
+def test_free_cells_are_taken_once():
+    cells = Grid.for_map(80, 22).cells
+    rooms: list[Room | Junction] = [Room(0, 0, 5, 4, cells[0]), Junction(40, 3, cells[1]), Room(54, 0, 4, 6, cells[2])]
+    free = FreeCells(rooms, random.Random(0))
+    # cells taken from a room are no longer free in any room
+    spots = [free.take_in_room(free.rooms[1]) for _ in range(3)]
+    while spot := free.take():
+        spots.append(spot)
+    assert len(spots) == len(set(spots)) == 3 * 2 + 2 * 4
+    assert all(1 <= x <= 3 and 1 <= y <= 2 or 55 <= x <= 56 and 1 <= y <= 4 for x, y in spots)
+    assert free.take_in_room(free.rooms[0]) is None
+
+
+# paint rooms and passages one after the other, the way levels used to be carved
+def carve_reference(level, all_rooms, passages):
+    for room in all_rooms:
+        if isinstance(room, Room):
+            level.tiles[room.x1:room.x2 + 1, room.y1:room.y2 + 1] = Tile.H_WALL
+            level.tiles[room.x1, room.y1:room.y2 + 1] = Tile.V_WALL
+            level.tiles[room.x2, room.y1:room.y2 + 1] = Tile.V_WALL
+            level.tiles[room.inner_slice] = Tile.FLOOR
+            level.tiles[room.x1, room.y1] = Tile.TL_CORNER
+            level.tiles[room.x2, room.y1] = Tile.TR_CORNER
+            level.tiles[room.x1, room.y2] = Tile.BL_CORNER
+            level.tiles[room.x2, room.y2] = Tile.BR_CORNER
+        else:
+            level.tiles[room.x, room.y] = Tile.PASSAGE
+    for passage in passages:
+        for x1, y1, x2, y2 in passage.segments:
+            level.tiles[min(x1, x2):max(x1, x2) + 1, min(y1, y2):max(y1, y2) + 1] = Tile.PASSAGE
+        for x, y in passage.doors:
+            level.tiles[x, y] = Tile.DOOR
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_carve(seed):
+    rng = random.Random(seed)
+    junction_indices = rng.choices(range(9), k=rng.randrange(4))
+    cells = Grid.for_map(80, 22).cells
+    rooms = [make_junction(cell, rng) if cell.index in junction_indices else make_room(cell, rng) for cell in cells]
+    passages = connect_rooms(rooms, rng)
+    level, reference = Level(80, 22, 1), Level(80, 22, 1)
+    carve(level, rooms, passages)
+    carve_reference(reference, rooms, passages)
+    assert np.array_equal(level.tiles, reference.tiles)
+    # every room and junction can be reached from every other one
+    spots = [(room.x, room.y) if isinstance(room, Junction) else (room.x1 + 1, room.y1 + 1) for room in rooms]
+    distance = level.distance_map(*spots[0]).distance
+    assert all(distance[spot] < np.iinfo(distance.dtype).max for spot in spots)
+
+
+def test_map_size():
+    assert generate_level(80, 20, 1, seed=0).tiles.shape == (80, 20)
+    for width, height in [(79, 22), (80, 19), (10, 10)]:
+        with pytest.raises(ValueError, match="too small"):
+            generate_level(width, height, 1, seed=0)
+    with pytest.raises(ValueError, match="too small"):
+        Grid(80, 22, 20, 3)
@@ -0,0 +1,69 @@
+import gc
+import random
+import weakref
+
+import numpy as np
+import tcod
+
+import game.messages
+import game.procgen
+import game.render
+import game.theme
+from benchmarks.bench_render import reference_render_map
+from game.constants import Tile
+from game.consumable import MagicMapping
+from game.entity import Actor
+
+
+def assert_same_frame(level, theme):
+    expected = tcod.console.Console(80, 24, order='F')
+    reference_render_map(expected, level, 1, theme)
+    actual = tcod.console.Console(80, 24, order='F')
+    game.render.render_map(actual, level, 1, theme)
+    assert np.array_equal(actual.rgb, expected.rgb)
+
+
+def test_incremental_render_map():
+    rng = random.Random(0)
+    for theme in (game.theme.default, game.theme.vt220_green, game.theme.default):
+        level = game.procgen.generate_level(80, 22, 1)
+        walkable = [(int(x), int(y)) for x, y in np.argwhere(level.walkable)]
+        for _ in range(100):
+            level.update_fov(*rng.choice(walkable))
+            entities = list(level.entities)
+            if entities and rng.random() < 0.3:
+                entity = rng.choice(entities)
+                x, y = rng.choice(walkable)
+                if level.is_empty_at(x, y):
+                    level.move_entity(entity, x, y)
+            if entities and rng.random() < 0.05:
+                level.entities.remove(rng.choice(entities))
+            if rng.random() < 0.1:
+                level.set_tile(*rng.choice(walkable), rng.choice([Tile.FLOOR, Tile.TRAP, Tile.DOOR]))
+            if rng.random() < 0.02:
+                MagicMapping().use(None, level, game.messages.MessageLog())
+            assert_same_frame(level, theme)
+
+
+def test_map_layer_lets_levels_go():
+    level = game.procgen.generate_level(80, 22, 1)
+    game.render.render_map(tcod.console.Console(80, 24, order='F'), level, 1, game.theme.default)
+    level = weakref.ref(level)
+    gc.collect()
+    assert level() is None
+
+
+def test_scrolling_render_map():
+    theme = game.theme.default
+    level = game.procgen.generate_level(200, 60, 1, seed=0)
+    level.update_fov(level.entry_x, level.entry_y)
+    full = tcod.console.Console(200, 62, order='F')
+    reference_render_map(full, level, 1, theme)
+    for focus in [(0, 0), (level.entry_x, level.entry_y), (100, 30), (199, 59)]:
+        x, y, width, height = game.render.viewport(level, focus)
+        assert (width, height) == (80, 22)
+        assert 0 <= x <= 120 and 0 <= y <= 38
+        assert x <= focus[0] < x + width and y <= focus[1] < y + height
+        actual = tcod.console.Console(80, 24, order='F')
+        game.render.render_map(actual, level, 1, theme, focus)
+        assert np.array_equal(actual.rgb[:, 1:23], full.rgb[x:x + 80, y + 1:y + 23])
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import game.dice
+from game.game_loop import new_game
+from game.procgen import LevelPregenerator, generate_level
+from game.rng import streams
+
+
+def test_same_seed_same_game():
+    player1, level1, _ = new_game(1234)
+    rolls1 = [game.dice.roll(3, 6) for _ in range(20)]
+    player2, level2, _ = new_game(1234)
+    rolls2 = [game.dice.roll(3, 6) for _ in range(20)]
+    assert np.array_equal(level1.tiles, level2.tiles)
+    assert (player1.x, player1.y) == (player2.x, player2.y)
+    assert rolls1 == rolls2
+
+
+def test_levels_do_not_depend_on_combat():
+    streams.reseed(42)
+    level1 = generate_level(80, 22, 3)
+    streams.reseed(42)
+    for _ in range(100):
+        game.dice.roll(1, 20)
+        streams.ai.random()
+    level2 = generate_level(80, 22, 3)
+    assert np.array_equal(level1.tiles, level2.tiles)
+    assert [(e.name, e.x, e.y) for e in level1.entities] == [(e.name, e.x, e.y) for e in level2.entities]
+
+
+def test_state_round_trip():
+    streams.reseed(7)
+    state = streams.getstate()
+    expected = [game.dice.roll(1, 100) for _ in range(10)]
+    streams.reseed(8)
+    streams.setstate(state)
+    assert [game.dice.roll(1, 100) for _ in range(10)] == expected
+
+
+def test_pregenerated_level_is_identical():
+    streams.reseed(5)
+    pregenerator = LevelPregenerator()
+    pregenerator.prefetch(80, 22, 4)
+    level1 = pregenerator.take(80, 22, 4)
+    level2 = generate_level(80, 22, 4)
+    assert np.array_equal(level1.tiles, level2.tiles)
+    assert [(e.name, e.x, e.y) for e in level1.entities] == [(e.name, e.x, e.y) for e in level2.entities]
+    # a level prefetched for an earlier game is not handed over
+    pregenerator.prefetch(80, 22, 4)
+    streams.reseed(6)
+    level3 = pregenerator.take(80, 22, 4)
+    assert np.array_equal(level3.tiles, generate_level(80, 22, 4).tiles)
+    assert not np.array_equal(level1.tiles, level3.tiles)
+
+
+def test_levels_generated_at_once_are_identical():
+    expected = [generate_level(80, 22, 2, seed) for seed in range(8)]
+    with ThreadPoolExecutor(4) as executor:
+        levels = list(executor.map(lambda seed: generate_level(80, 22, 2, seed), range(8)))
+    for level1, level2 in zip(levels, expected, strict=True):
+        assert np.array_equal(level1.tiles, level2.tiles)
+        assert [(e.name, e.x, e.y) for e in level1.entities] == [(e.name, e.x, e.y) for e in level2.entities]
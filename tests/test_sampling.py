@@ -0,0 +1,49 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+import game.items
+import game.monsters
+from game.sampling import AliasTable
+
+
+@pytest.mark.parametrize('weights', [[1], [1, 1], [0, 3, 1], [20] * 5, [9, 1, 0, 0, 90], [7, 11, 13, 2]])
+def test_alias_table(weights):
+    table = AliasTable(list(range(len(weights))), weights)
+    assert table.probabilities() == [Fraction(w, sum(weights)) for w in weights]
+    rng = random.Random(0)
+    assert all(weights[table.sample(rng)] > 0 for _ in range(1000))
+
+
+FIRST_FIVE = ['kobold', 'jackal', 'bat', 'snake', 'hobgoblin']
+LAST_FOUR = ['umber hulk', 'vampire', 'purple worm', 'dragon']
+
+
+# The exact odds of each monster at a few depths. Monsters that are never generated (e.g. mimics) are left out.
+@pytest.mark.parametrize('depth, expected', [
+    (1, {name: Fraction(1, 5) for name in FIRST_FIVE}),
+    (3, {name: Fraction(8, 45) for name in FIRST_FIVE} | {'giant ant': Fraction(1, 9)}),
+    (6, {name: Fraction(1, 9) for name in FIRST_FIVE + ['giant ant', 'orc', 'zombie', 'gnome']}),
+    (10, {name: Fraction(1, 9) for name in ['hobgoblin', 'giant ant', 'orc', 'zombie', 'gnome', 'leprechaun',
+                                            'centaur', 'rust monster', 'quasit']}),
+    (22, {name: Fraction(1, 8) for name in ['troll', 'wraith', 'invisible stalker', 'xorn'] + LAST_FOUR}),
+    (24, {'invisible stalker': Fraction(5, 38), 'xorn': Fraction(5, 38)} | {name: Fraction(7, 38) for name in LAST_FOUR}),
+    (27, {name: Fraction(1, 4) for name in LAST_FOUR}),
+    (40, {name: Fraction(1, 4) for name in LAST_FOUR}),
+])
+def test_monster_table(depth, expected):
+    table = game.monsters.monster_table(depth)
+    assert {monster.name: p for monster, p in zip(table.items, table.probabilities(), strict=True)} == expected
+
+
+def test_item_table():
+    table = game.items.item_table()
+    probabilities = dict(zip(map(id, table.items), table.probabilities()))
+    categories = game.items.item_categories
+    category_total = sum(category.weight for category in categories)
+    for category in categories:
+        type_total = sum(item_type.weight for item_type in category.item_types)
+        for item_type in category.item_types:
+            expected = Fraction(category.weight, category_total) * Fraction(item_type.weight, type_total)
+            assert probabilities[id(item_type)] == expected
@@ -0,0 +1,240 @@
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+import tcod
+
+import game.actor_ai
+import game.attack
+import game.consumable
+import game.save
+import game.schema
+import game.timeline
+from game.codec import Codec, Record
+from game.constants import Glyph
+from game.dungeon import Dungeon
+from game.game_loop import new_game, next_level
+from game.journal import Journal
+from game.replay import replay_journal
+from game.simulation import Simulation, StairsBot
+from game.state import GameOver, More, Play, State, handle_event
+
+
+def test_codec_values():
+    codec = Codec([Record(Glyph)])
+    values = [
+        None, True, False, 0, -1, 2**70, -(2**70), 1.5, '', 'kobold ✓', (1, 'a'), [[], {}], {(1, 2): [3]},
+        deque([1, 2], maxlen=5), slice(1, None, -1), tuple(range(100)), list(range(2**32 - 20, 2**32)), Glyph.GOLD,
+    ]
+    decoded = codec.decode(codec.encode(values))
+    assert decoded == values
+    assert [type(value) for value in decoded] == [type(value) for value in values]
+    assert decoded[13].maxlen == 5
+
+
+@pytest.mark.parametrize('dtype', [np.uint8, np.int16, bool])
+@pytest.mark.parametrize('order', ['C', 'F'])
+def test_codec_arrays(dtype, order):
+    codec = Codec([])
+    array = np.asarray(np.random.default_rng(0).integers(0, 3, (13, 7)), dtype=dtype, order=order)
+    decoded = codec.decode(codec.encode(array))
+    assert decoded.dtype == array.dtype
+    assert (decoded == array).all()
+    assert decoded.flags.f_contiguous == (order == 'F')
+    assert decoded.flags.writeable
+
+
+def test_codec_out_of_band_arrays():
+    codec = Codec([])
+    arrays = [np.arange(12, dtype=np.int16).reshape(3, 4), np.asfortranarray(np.eye(3, dtype=bool))]
+    buffers = []
+    data = codec.encode(arrays, buffers)
+    assert len(buffers) == 2 and len(data) < 50
+    arrays[0][0, 0] = 99
+    memory = [memoryview(bytearray(buffer)) for buffer in buffers]
+    decoded = codec.decode(data, memory)
+    assert decoded[0][0, 0] == 0 and (decoded[1] == np.eye(3)).all()
+    assert decoded[1].flags.f_contiguous
+    # the arrays are views of the buffers
+    decoded[0][0, 0] = 5
+    assert memory[0][0] == 5
+
+
+def test_codec_rejects_unknown_values():
+    with pytest.raises(TypeError):
+        Codec([]).encode(object())
+    with pytest.raises(ValueError):
+        Codec([]).decode(Codec([]).encode([1, 2, 3])[:-1])
+    with pytest.raises(ValueError, match="Unknown class index"):
+        Codec([]).decode(Codec([Record(Glyph)]).encode(Glyph.GOLD))
+
+
+class Part:
+    pass
+
+
+# Its state is made anew on every encoding, and dropped right after.
+class Whole:
+    def __getstate__(self):
+        return {'part': Part()}
+
+    def __setstate__(self, state):
+        self.part = state['part']
+
+
+def test_codec_keeps_temporary_objects_apart():
+    codec = Codec([Record(Part, ()), Record(Whole, ('part',))])
+    decoded = codec.decode(codec.encode([Whole() for _ in range(10)]))
+    assert len({id(whole.part) for whole in decoded}) == 10
+
+
+def test_schema_covers_all_classes():
+    for module, base in [(game.actor_ai, game.actor_ai.ActorAI), (game.attack, game.attack.Attack),
+                         (game.consumable, game.consumable.Consumable)]:
+        for cls in base.__subclasses__():
+            if cls.__module__ == module.__name__:
+                assert getattr(module, cls.__name__) in game.schema.SCHEMA.index
+
+
+# A game saved and loaded midway must play out exactly like one that was never interrupted.
+def test_save_and_load(tmp_path):
+    filename = tmp_path / 'savegame'
+    for seed in range(5):
+        simulation = Simulation.new_game(StairsBot(), seed)
+        simulation.run(200)
+        game.save.save_game(filename, simulation.player, Dungeon(simulation.level), simulation.log)
+        turns = simulation.turns
+        expected = simulation.run(2000)
+        loaded = game.save.load_game(filename)
+        assert loaded is not None
+        assert not filename.exists()
+        player, dungeon, log, _ = loaded
+        level = dungeon.level
+        assert player in level.actors
+        for grid in (level.tiles, level.room_grid):
+            assert grid.flags.writeable and grid.flags.f_contiguous and not grid.flags.owndata
+            assert grid.ctypes.data % game.save.GRID_ALIGNMENT == 0
+        for grid in (level.visible, level.explored):
+            assert grid.flags.writeable and grid.flags.f_contiguous
+        resumed = Simulation(StairsBot(), player, level, log)
+        resumed.turns = turns
+        assert resumed.run(2000) == expected
+
+
+def test_grid_layout():
+    simulation = Simulation.new_game(StairsBot(), seed=0)
+    savefile = game.schema.SaveFile(simulation.player, simulation.level, simulation.log, ())
+    serialized, grids = game.save._encode(savefile)
+    content = game.save._pack(serialized, grids)
+    _, n_grids = game.save.LAYOUT.unpack_from(content, len(game.save.HEADER))
+    start = len(game.save.HEADER) + game.save.LAYOUT.size
+    table = list(game.save.GRID.iter_unpack(content[start:start + n_grids * game.save.GRID.size]))
+    assert [size for _, size in table] == [len(grid) for grid in grids]
+    assert all(position % game.save.GRID_ALIGNMENT == 0 for position, _ in table)
+    assert content[table[0][0]:table[0][0] + table[0][1]] == simulation.level.tiles.tobytes(order='F')
+    assert (game.save._unpack(bytearray(content)).level.explored == simulation.level.explored).all()
+
+
+def test_incompatible_savegame(tmp_path):
+    filename = tmp_path / 'savegame'
+    assert game.save.load_game(filename) is None
+    filename.write_bytes(game.save.HEADER + b'garbage')
+    assert game.save.load_game(filename) is None
+
+
+def test_autosave(tmp_path):
+    filename = tmp_path / 'savegame'
+    simulation = Simulation.new_game(StairsBot(), seed=0)
+    autosave = game.save.Autosave(filename, interval=10)
+    autosave.update(simulation.player, Dungeon(simulation.level), simulation.log)
+    autosave.close()
+    assert list(tmp_path.iterdir()) == [filename]
+    assert game.save.load_game(filename) is not None
+    saves = []
+    autosave = game.save.Autosave(filename, interval=10)
+    save = autosave.save
+
+    def spy(player, dungeon, log):
+        saves.append((dungeon.level.depth, dungeon.level.clock))
+        return save(player, dungeon, log)
+
+    autosave.save = spy
+    dungeon = Dungeon(simulation.level)
+    autosave.update(simulation.player, dungeon, simulation.log)
+    while simulation.level.depth < 3:
+        simulation.step()
+        dungeon.level = simulation.level
+        autosave.update(simulation.player, dungeon, simulation.log)
+    autosave.close()
+    # every 10 turns, and on every new level
+    assert saves[0] == (1, 0)
+    assert all(clock - previous == 10 * game.timeline.TURN
+               for (depth, clock), (previous_depth, previous) in zip(saves[1:], saves) if depth == previous_depth)
+    assert [depth for depth, clock in saves if clock == 0] == [1, 2, 3]
+
+
+def test_autosave_discarded_when_game_is_over(tmp_path):
+    filename = tmp_path / 'savegame'
+    simulation = Simulation.new_game(StairsBot(), seed=0)
+    autosave = game.save.Autosave(filename)
+    dungeon = Dungeon(simulation.level)
+    autosave.save(simulation.player, dungeon, simulation.log)
+    autosave.discard()
+    autosave.update(simulation.player, dungeon, simulation.log)
+    autosave.close()
+    assert not filename.exists()
+
+
+# An autosave taken while a prompt is on screen, then a crash: the game resumes in the Play state from the autosave,
+# the key presses recorded after it are lost, and the journal still replays to the resumed game.
+def test_autosave_mid_prompt_then_crash(tmp_path):
+    filename, journal_file = tmp_path / 'savegame', tmp_path / 'yarc.jnl'
+    keys = random.Random(3)
+    syms = [tcod.event.KeySym.h, tcod.event.KeySym.j, tcod.event.KeySym.k, tcod.event.KeySym.l,
+            tcod.event.KeySym.y, tcod.event.KeySym.u, tcod.event.KeySym.b, tcod.event.KeySym.n,
+            tcod.event.KeySym.PERIOD, tcod.event.KeySym.RETURN]
+
+    def press(state, player, dungeon, log, journal):
+        event = tcod.event.KeyDown(0, keys.choice(syms), tcod.event.Modifier.NONE)
+        journal.record(event)
+        state = handle_event(state, event, player, dungeon.level, log)
+        if dungeon.level.completed:
+            level = dungeon.level
+            dungeon.leave(player)
+            dungeon.enter(next_level(player, level))
+        return state
+
+    player, level, log = new_game(3)
+    dungeon = Dungeon(level)
+    state: State = Play()
+    state.enter(log)
+    journal = Journal.create(journal_file, 3)
+    while not isinstance(state, More | GameOver):
+        state = press(state, player, dungeon, log, journal)
+    assert isinstance(state, More)
+    autosave = game.save.Autosave(filename, journal=journal)
+    autosave.save(player, dungeon, log)
+    autosave.close()
+    saved_events = journal.events
+    for _ in range(5):
+        state = press(state, player, dungeon, log, journal)
+    journal.close()
+    loaded = game.save.load_game(filename)
+    assert loaded is not None
+    player, dungeon, log, journal_events = loaded
+    assert journal_events == saved_events
+    journal = Journal.resume(journal_file, 3, journal_events)
+    assert journal is not None and journal.events == saved_events + 1
+    state = Play()
+    state.enter(log)
+    for _ in range(200):
+        if isinstance(state, GameOver):
+            break
+        state = press(state, player, dungeon, log, journal)
+    journal.close()
+    replay = replay_journal(journal_file)
+    assert replay.events == journal.events
+    assert (replay.player.x, replay.player.y, replay.player.stats.hp) == (player.x, player.y, player.stats.hp)
+    assert replay.level.depth == dungeon.level.depth and replay.level.clock == dungeon.level.clock
+    assert type(replay.state) is type(state)
@@ -0,0 +1,70 @@
+import game.action
+import game.batch
+import game.simulation
+import game.timeline
+import game.turn
+from game.action import WaitAction
+
+
+class WaitingBot(game.simulation.StairsBot):
+    def act(self, player, level, log):
+        return WaitAction()
+
+
+def test_run_until_death():
+    for _ in range(5):
+        simulation = game.simulation.Simulation.new_game(game.simulation.StairsBot())
+        result = simulation.run(100_000)
+        assert simulation.game_over
+        assert result.cause_of_death is not None
+        assert result.depth >= 1
+        assert result.turns > 0
+
+
+def test_action_limit():
+    simulation = game.simulation.Simulation.new_game(WaitingBot())
+    simulation.player.stats.hp = simulation.player.stats.max_hp = 10**9
+    result = simulation.run(100)
+    assert result.turns == 100
+    assert result.depth == 1
+
+
+def test_seeded_games_are_reproducible():
+    for seed in range(3):
+        assert game.batch.play_game(seed) == game.batch.play_game(seed)
+
+
+def test_batch_summary():
+    summary = game.batch.BatchSummary()
+    summary.add(game.simulation.GameResult(depth=3, turns=100, gold=10, cause_of_death='kobold'))
+    summary.add(game.simulation.GameResult(depth=5, turns=300, gold=30, cause_of_death='kobold'))
+    assert summary.to_dict() == {
+        'games': 2,
+        'mean_depth': 4,
+        'max_depth': 5,
+        'mean_turns': 200,
+        'mean_gold': 20,
+        'causes_of_death': {'kobold': 2},
+    }
+
+
+# The flat loop the timeline replaced: every actor acts once per player action.
+def flat_end_turn(player, level, log, cost=game.timeline.TURN):
+    level.update_fov(player.x, player.y)
+    game.turn._heal_player(player)
+    game.turn._hunger_clock(player, log)
+    for actor in list(level.actors):
+        if actor.ai:
+            if player.stats.hp == 0:
+                break
+            actor.ai.take_turn(actor, level, player).perform(actor, level, log)
+            if actor.x - 1 <= player.x <= actor.x + 1 and actor.y - 1 <= player.y <= actor.y + 1:
+                actor.ai.on_disturbed(actor, level)
+
+
+# At normal speeds, skipping dormant monsters and scheduling the others on the timeline must not change the game.
+def test_timeline_matches_flat_turn_loop(monkeypatch):
+    scheduled = [game.batch.play_game(seed) for seed in range(10)]
+    monkeypatch.setattr(game.turn, 'end_turn', flat_end_turn)
+    monkeypatch.setattr(game.action, 'end_turn', flat_end_turn)
+    assert [game.batch.play_game(seed) for seed in range(10)] == scheduled
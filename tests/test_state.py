@@ -0,0 +1,30 @@
+import pytest
+import tcod
+
+import game.state
+from game.game_loop import new_game
+
+
+@pytest.fixture
+def game_state():
+    return new_game()
+
+
+def key(sym, mod=tcod.event.KMOD_NONE):
+    return tcod.event.KeyDown(0, sym, mod)
+
+
+def test_ignored_events_keep_state(game_state):
+    player, level, log = game_state
+    for state in (game.state.Play(), game.state.More(), game.state.ShowInventory(), game.state.DropItem()):
+        assert state.event(tcod.event.MouseMotion(), player, level, log) is state
+        assert state.event(tcod.event.WindowEvent('WindowExposed'), player, level, log) is state
+        assert state.event(key(tcod.event.KeySym.F1), player, level, log) is state
+
+
+def test_handled_events_change_state(game_state):
+    player, level, log = game_state
+    state = game.state.Play()
+    assert state.event(key(tcod.event.KeySym.PERIOD), player, level, log) is not state
+    state = game.state.ShowInventory()
+    assert state.event(key(tcod.event.KeySym.SPACE), player, level, log) is not state
@@ -0,0 +1,92 @@
+import numpy as np
+
+import game.game_loop
+import game.level
+import game.turn
+from game.action import ActionResult, WaitAction
+from game.actor_ai import ActorAI, HostileAI, IdleAI
+from game.combat import Stats
+from game.constants import Glyph, Tile
+from game.entity import Actor, Player
+from game.timeline import TURN, Timeline
+
+
+class SlowAction(WaitAction):
+    def perform(self, actor, level, log):
+        return ActionResult(True, cost=3 * TURN)
+
+
+class CountingAI(ActorAI):
+    def __init__(self, turns, action=WaitAction()):
+        self.turns, self.action = turns, action
+
+    def take_turn(self, actor, level, player):
+        self.turns.append(actor.name)
+        return self.action
+
+    def is_helpless(self):
+        return False
+
+
+def test_timeline_order(make_actor):
+    timeline = Timeline()
+    a, b, c = make_actor(0, 0), make_actor(1, 0), make_actor(2, 0)
+    for actor in [a, b, c]:
+        timeline.join(actor)
+    timeline.schedule(c, 5)
+    timeline.schedule(b, 3)
+    timeline.schedule(a, 3)
+    timeline.schedule(a, 1)
+    assert timeline.is_scheduled(a) and timeline.is_scheduled(b)
+    # ties are broken by the order the actors joined; c is not due before 5
+    assert timeline.pop(5) is a and timeline.clock == 3
+    assert timeline.pop(5) is b
+    assert timeline.pop(5) is None
+    # an actor leaving the level is skipped, even when it joins again
+    timeline.leave(c)
+    timeline.join(c)
+    assert timeline.pop(10) is None
+    timeline.schedule(c, 7)
+    assert timeline.pop(10) is c and timeline.clock == 7
+
+
+def test_dormant_actors_are_not_scheduled(make_actor):
+    level = game.level.Level(10, 5, 1)
+    level.tiles[:, :] = Tile.FLOOR
+    idle, hostile = make_actor(1, 1), make_actor(5, 1)
+    idle.ai, hostile.ai = IdleAI(), HostileAI()
+    level.entities.add(idle)
+    level.entities.add(hostile)
+    assert not level.timeline.is_scheduled(idle)
+    assert level.timeline.is_scheduled(hostile)
+    idle.ai = HostileAI()
+    level.wake(idle)
+    assert level.timeline.is_scheduled(idle)
+    level.entities.remove(hostile)
+    assert not level.timeline.is_scheduled(hostile)
+
+
+def test_speeds_and_costs(make_actor):
+    player, level, log = game.game_loop.new_game(0)
+    for actor in list(level.actors):
+        if not isinstance(actor, Player):
+            level.entities.remove(actor)
+    floor = [(int(x), int(y)) for x, y in np.argwhere(level.tiles == Tile.FLOOR)
+             if max(abs(x - player.x), abs(y - player.y)) > 1 and level.is_empty_at(x, y)]
+    turns: list[str] = []
+    speeds = {'fast': 200, 'normal': 100, 'slow': 50, 'sluggish': 100}
+    for (x, y), (name, speed) in zip(floor, speeds.items()):
+        actor = make_actor(x, y)
+        actor.name, actor.speed = name, speed
+        actor.ai = CountingAI(turns, SlowAction() if name == 'sluggish' else WaitAction())
+        level.entities.add(actor)
+    for _ in range(6):
+        game.turn.end_turn(player, level, log)
+    assert level.clock == 6 * TURN
+    assert {name: turns.count(name) for name in speeds} == {'fast': 12, 'normal': 6, 'slow': 3, 'sluggish': 2}
+    # a hasted player sees everyone act half as often
+    turns.clear()
+    player.speed = 200
+    for _ in range(6):
+        game.turn.end_turn(player, level, log)
+    assert {name: turns.count(name) for name in speeds} == {'fast': 6, 'normal': 3, 'slow': 2, 'sluggish': 1}